@@ -0,0 +1,34 @@
+"""Cascade deletes from a comment to its replies in the database
+
+Revision ID: 2b6d9e4a7c15
+Revises: c7a3e9f21d58
+Create Date: 2026-10-18 18:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2b6d9e4a7c15'
+down_revision: Union[str, None] = 'c7a3e9f21d58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # EventComment.replies est passive_deletes : Postgres supprime les réponses
+    op.drop_constraint('event_comments_parent_id_fkey', 'event_comments', type_='foreignkey')
+    op.create_foreign_key(
+        'event_comments_parent_id_fkey', 'event_comments', 'event_comments',
+        ['parent_id'], ['id'], ondelete='CASCADE'
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('event_comments_parent_id_fkey', 'event_comments', type_='foreignkey')
+    op.create_foreign_key(
+        'event_comments_parent_id_fkey', 'event_comments', 'event_comments',
+        ['parent_id'], ['id']
+    )
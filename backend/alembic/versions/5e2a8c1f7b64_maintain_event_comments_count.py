@@ -0,0 +1,38 @@
+"""Maintain events.comments_count with a trigger
+
+Revision ID: 5e2a8c1f7b64
+Revises: 9d4f1a6b2c83
+Create Date: 2026-10-18 15:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.events.models import COMMENTS_COUNT_TRIGGER_FUNCTION, COMMENTS_COUNT_TRIGGER
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2a8c1f7b64'
+down_revision: Union[str, None] = '9d4f1a6b2c83'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(COMMENTS_COUNT_TRIGGER_FUNCTION)
+    op.execute("DROP TRIGGER IF EXISTS trg_event_comments_count ON event_comments")
+    op.execute(COMMENTS_COUNT_TRIGGER)
+    # Point de départ exact pour le compteur dénormalisé
+    op.execute("""
+        UPDATE events AS e
+        SET comments_count = (SELECT count(*) FROM event_comments c WHERE c.event_id = e.id)
+    """)
+    op.alter_column('events', 'comments_count', server_default=sa.text('0'))
+
+
+def downgrade() -> None:
+    op.alter_column('events', 'comments_count', server_default=None)
+    op.execute("DROP TRIGGER IF EXISTS trg_event_comments_count ON event_comments")
+    op.execute("DROP FUNCTION IF EXISTS event_comments_count()")
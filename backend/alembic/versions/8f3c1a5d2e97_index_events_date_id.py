@@ -0,0 +1,25 @@
+"""Index events on (date, id) for keyset pagination
+
+Revision ID: 8f3c1a5d2e97
+Revises: 2b6d9e4a7c15
+Create Date: 2026-10-18 18:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f3c1a5d2e97'
+down_revision: Union[str, None] = '2b6d9e4a7c15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_events_date_id', 'events', ['date', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_events_date_id', table_name='events')
@@ -0,0 +1,28 @@
+"""Index event_comments on event_id and parent_id for thread loading
+
+Revision ID: 9d4f1a6b2c83
+Revises: 3b1e7c2d9a40
+Create Date: 2026-10-18 14:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4f1a6b2c83'
+down_revision: Union[str, None] = '3b1e7c2d9a40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_event_comments_event_id'), 'event_comments', ['event_id'], unique=False)
+    op.create_index(op.f('ix_event_comments_parent_id'), 'event_comments', ['parent_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_event_comments_parent_id'), table_name='event_comments')
+    op.drop_index(op.f('ix_event_comments_event_id'), table_name='event_comments')
@@ -0,0 +1,28 @@
+"""Add events.image_variants
+
+Revision ID: c7a3e9f21d58
+Revises: 5e2a8c1f7b64
+Create Date: 2026-10-18 16:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7a3e9f21d58'
+down_revision: Union[str, None] = '5e2a8c1f7b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Nullable : les événements existants gardent uniquement l'image d'origine
+    op.add_column('events', sa.Column('image_variants', postgresql.JSONB(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('events', 'image_variants')
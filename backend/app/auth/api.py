@@ -8,10 +8,14 @@ import time
 import requests
 import logging
 
-from app.auth import models, schemas, password, jwt_handler
+from app.auth import models, schemas, jwt_handler
 from app.auth.dependencies import get_current_user, oauth2_scheme
+from app.auth.permissions import require_role
+from app.auth.principal_cache import principal_cache
+from app.auth.password import password_hasher, PasswordHasherBusyError
 from app.db.session import get_db
 from app.db.mongo import profiles_collection
+from app.users.search import with_search_keys
 
 from app.utils.code import generate_verification_code
 from app.utils.email import send_email_async
@@ -21,6 +25,8 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+PASSWORD_BUSY_DETAIL = "Service momentanément surchargé, réessayez"
+
 # Stock temporaire des codes de réinitialisation
 reset_codes = {}
 
@@ -60,7 +66,7 @@ async def register(user: schemas.UserRegister, db: AsyncSession = Depends(get_db
             if result.scalars().first():
                 raise HTTPException(status_code=400, detail="Téléphone déjà enregistré")
 
-        hashed = password.hash_password(user.password)
+        hashed = await password_hasher.hash(user.password)
 
         avatar_url = getattr(user, 'avatar_url', None)
         if not avatar_url:
@@ -106,10 +112,12 @@ async def register(user: schemas.UserRegister, db: AsyncSession = Depends(get_db
             "notifications": []
         }
 
-        profiles_collection.insert_one(profile_doc)
+        profiles_collection.insert_one(with_search_keys(profile_doc))
 
         return {"msg": "Utilisateur enregistré avec succès", "user_id": user_id_int}
 
+    except PasswordHasherBusyError:
+        raise HTTPException(status_code=503, detail=PASSWORD_BUSY_DETAIL, headers={"Retry-After": "1"})
     except Exception as e:
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"Erreur interne : {str(e)}")
@@ -119,9 +127,17 @@ async def register(user: schemas.UserRegister, db: AsyncSession = Depends(get_db
 async def login(user: schemas.UserLogin, db: AsyncSession = Depends(get_db)):
     try:
         db_user = await get_user_by_identifier(db, user.identifier)
-        if not db_user or not password.verify_password(user.password, db_user.hashed_password):
+        if not db_user:
             raise HTTPException(status_code=401, detail="Identifiant ou mot de passe incorrect")
 
+        valid, new_hash = await password_hasher.verify_and_update(user.password, db_user.hashed_password)
+        if not valid:
+            raise HTTPException(status_code=401, detail="Identifiant ou mot de passe incorrect")
+        if new_hash:
+            # Paramètres bcrypt modifiés depuis le dernier hash : mise à jour transparente
+            db_user.hashed_password = new_hash
+            await db.commit()
+
         access_token = jwt_handler.create_access_token({
             "sub": db_user.email if db_user.email else db_user.phone,
             "role": db_user.role,
@@ -139,6 +155,8 @@ async def login(user: schemas.UserLogin, db: AsyncSession = Depends(get_db)):
         }
     except HTTPException:
         raise
+    except PasswordHasherBusyError:
+        raise HTTPException(status_code=503, detail=PASSWORD_BUSY_DETAIL, headers={"Retry-After": "1"})
     except Exception as e:
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"Erreur interne : {str(e)}")
@@ -174,7 +192,7 @@ async def forgot_password(data: schemas.ForgotPasswordRequest, db: AsyncSession
             body = f"Voici votre code de réinitialisation : {code}\nIl expire dans 10 minutes."
             await send_email_async(subject, data.identifier, body)
         else:
-            logger.info(f"[SMS] Code pour {data.identifier} : {code}")
+            logger.info(f"[SMS] Code de réinitialisation envoyé à {data.identifier}")
 
         return {"msg": "Code de réinitialisation envoyé"}
 
@@ -236,9 +254,10 @@ async def reset_password(data: schemas.ResetPasswordRequest, db: AsyncSession =
         if not db_user:
             raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
 
-        hashed = password.hash_password(data.new_password)
+        hashed = await password_hasher.hash(data.new_password)
         db_user.hashed_password = hashed
         await db.commit()
+        await principal_cache.invalidate(db_user.id)
 
         reset_codes.pop(verified_identifier, None)
 
@@ -246,6 +265,8 @@ async def reset_password(data: schemas.ResetPasswordRequest, db: AsyncSession =
 
     except HTTPException:
         raise
+    except PasswordHasherBusyError:
+        raise HTTPException(status_code=503, detail=PASSWORD_BUSY_DETAIL, headers={"Retry-After": "1"})
     except Exception as e:
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"Erreur interne : {str(e)}")
@@ -348,7 +369,7 @@ async def social_login(request: schemas.SocialLoginRequest, db: AsyncSession = D
             await db.commit()
             await db.refresh(user)
 
-            profiles_collection.insert_one({
+            profiles_collection.insert_one(with_search_keys({
                 "user_id": user.id,
                 "email": user.email,
                 "first_name": user.first_name,
@@ -358,7 +379,7 @@ async def social_login(request: schemas.SocialLoginRequest, db: AsyncSession = D
                 "online_status": False,
                 "registered_at": datetime.utcnow(),
                 "avatar_url": None
-            })
+            }))
 
         token_jwt = jwt_handler.create_access_token({
             "sub": user.email,
@@ -383,3 +404,15 @@ async def social_login(request: schemas.SocialLoginRequest, db: AsyncSession = D
     except Exception as e:
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"Erreur interne : {str(e)}")
+
+
+@router.get("/metrics/principal-cache")
+async def principal_cache_metrics(user=Depends(require_role("admin"))):
+    """Taux de succès du cache de get_current_user"""
+    return principal_cache.stats()
+
+
+@router.get("/metrics/password-hasher")
+async def password_hasher_metrics(user=Depends(require_role("admin"))):
+    """Occupation et file d'attente du pool bcrypt"""
+    return password_hasher.stats()
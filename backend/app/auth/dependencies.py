@@ -9,12 +9,12 @@ import logging
 from app.db.session import get_db
 from app.db.mongo import profiles_collection
 from app.auth.models import User  # PostgreSQL
+from app.auth.principal_cache import principal_cache
 from app.users.models import UserProfile  # MongoDB (facultatif)
 from app.config import settings  # Utilisation de settings importé depuis config.py
 
 # Initialiser le logger
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
 
 # Utilisé pour extraire le token depuis le header Authorization
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
@@ -28,8 +28,6 @@ async def get_current_user(
     """
     🔐 Récupère l'utilisateur courant à partir du token JWT.
     """
-    logger.info(f"🔐 Token reçu du frontend : {token}")
-
     if not token:
         logger.warning("⛔ Accès refusé : token manquant")
         raise HTTPException(
@@ -67,6 +65,11 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # Cache LRU/TTL : évite la requête Postgres pour les utilisateurs récemment vus
+    user = await principal_cache.get(user_id_int)
+    if user:
+        return user
+
     result = await db.execute(select(User).where(User.id == user_id_int))
     user = result.scalars().first()
     if not user:
@@ -77,7 +80,8 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    logger.info(f"✅ Utilisateur authentifié : id={user.id}, email={user.email}")
+    await principal_cache.set(user)
+    logger.debug(f"✅ Utilisateur authentifié : id={user.id}")
     return user
 
 # 🔓 Version optionnelle avec MongoDB (utile pour les profils, facultatif)
@@ -21,7 +21,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
     token = jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.ALGORITHM)
     
-    logger.info(f"Token JWT généré pour user_id={to_encode.get('user_id')}, jti={to_encode['jti']} : {token}")
+    logger.debug(f"Token JWT généré pour user_id={to_encode.get('user_id')}, jti={to_encode['jti']}")
     
     return token
     
@@ -1,9 +1,146 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.config import settings
+
+# Changer PASSWORD_BCRYPT_ROUNDS rend les anciens hash « à mettre à jour » :
+# ils sont recalculés à la prochaine connexion réussie (verify_and_update)
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+)
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
+
+
+class PasswordHasherBusyError(Exception):
+    """File d'attente pleine : la requête est refusée plutôt que mise en attente indéfiniment"""
+
+
+class PasswordHasher:
+    """
+    Exécute bcrypt hors de la boucle d'événements. bcrypt libère le GIL pendant
+    le calcul : un pool de threads suffit à occuper plusieurs cœurs sans le coût
+    de sérialisation d'un pool de processus.
+    - au plus `workers` calculs simultanés
+    - au plus `max_queue` requêtes en attente, au-delà PasswordHasherBusyError
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._waiting = 0
+        self._max_waiting = 0
+        self._rejected = 0
+        self._rehashed = 0
+        self._stats = {}
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        return self._slots
+
+    def _record(self, operation: str, wait_ms: float, duration_ms: float) -> None:
+        with self._lock:
+            entry = self._stats.setdefault(
+                operation, {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "wait_ms": 0.0, "max_wait_ms": 0.0}
+            )
+            entry["count"] += 1
+            entry["total_ms"] += duration_ms
+            entry["max_ms"] = max(entry["max_ms"], duration_ms)
+            entry["wait_ms"] += wait_ms
+            entry["max_wait_ms"] = max(entry["max_wait_ms"], wait_ms)
+
+    async def _run(self, operation: str, fn, *args):
+        if self._waiting >= self.max_queue:
+            self._rejected += 1
+            raise PasswordHasherBusyError("Trop de calculs de mot de passe en attente")
+
+        queued_at = time.perf_counter()
+        self._waiting += 1
+        self._max_waiting = max(self._max_waiting, self._waiting)
+        try:
+            await self._get_slots().acquire()
+        finally:
+            self._waiting -= 1
+        started_at = time.perf_counter()
+        self._in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self._in_flight -= 1
+            self._get_slots().release()
+            self._record(
+                operation,
+                (started_at - queued_at) * 1000,
+                (time.perf_counter() - started_at) * 1000,
+            )
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", pwd_context.hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run("verify", pwd_context.verify, plain_password, hashed_password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Vérifie le mot de passe et, si le hash utilise d'anciens paramètres
+        (pwd_context.needs_update), retourne le nouveau hash à enregistrer.
+        """
+        valid, new_hash = await self._run(
+            "verify", pwd_context.verify_and_update, plain_password, hashed_password
+        )
+        if new_hash:
+            self._rehashed += 1
+        return valid, new_hash
+
+    def stats(self) -> dict:
+        with self._lock:
+            operations = {
+                name: {
+                    "count": entry["count"],
+                    "avg_ms": round(entry["total_ms"] / entry["count"], 2),
+                    "max_ms": round(entry["max_ms"], 2),
+                    "avg_wait_ms": round(entry["wait_ms"] / entry["count"], 2),
+                    "max_wait_ms": round(entry["max_wait_ms"], 2),
+                }
+                for name, entry in self._stats.items()
+            }
+        return {
+            "workers": self.workers,
+            "in_flight": self._in_flight,
+            "queue_depth": self._waiting,
+            "max_queue_depth": self._max_waiting,
+            "max_queue": self.max_queue,
+            "rejected": self._rejected,
+            "rehashed": self._rehashed,
+            "rounds": settings.PASSWORD_BCRYPT_ROUNDS,
+            "operations": operations,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_QUEUE)
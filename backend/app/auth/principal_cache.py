@@ -0,0 +1,117 @@
+# app/auth/principal_cache.py - Cache à deux niveaux de l'utilisateur authentifié
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.auth.models import User
+from app.config import settings
+
+# Projection minimale de User conservée en cache
+PRINCIPAL_FIELDS = ("id", "email", "phone", "first_name", "last_name", "role")
+
+
+class LocalSharedBackend:
+    """
+    Stand-in en mémoire du backend partagé (même interface asynchrone qu'un
+    client Redis/Memcached : get / set avec TTL / delete).
+    """
+
+    def __init__(self):
+        self._data: Dict[str, tuple] = {}
+
+    async def get(self, key: str) -> Optional[dict]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            self._data.pop(key, None)
+            return None
+        return value
+
+    async def set(self, key: str, value: dict, ttl: float) -> None:
+        self._data[key] = (value, time.monotonic() + ttl)
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+
+class PrincipalCache:
+    """
+    Niveau 1 : LRU en mémoire du processus avec TTL.
+    Niveau 2 (optionnel) : backend partagé entre workers.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, shared_backend: Any = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.shared_backend = shared_backend
+        self._local: "OrderedDict[int, tuple]" = OrderedDict()
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"principal:{user_id}"
+
+    async def get(self, user_id: int) -> Optional[User]:
+        entry = self._local.get(user_id)
+        if entry is not None:
+            data, expires_at = entry
+            if expires_at >= time.monotonic():
+                self._local.move_to_end(user_id)
+                self.local_hits += 1
+                return self._to_user(data)
+            self._local.pop(user_id, None)
+
+        if self.shared_backend is not None:
+            data = await self.shared_backend.get(self._key(user_id))
+            if data is not None:
+                self.shared_hits += 1
+                self._store_local(user_id, data)
+                return self._to_user(data)
+
+        self.misses += 1
+        return None
+
+    async def set(self, user: User) -> None:
+        data = {field: getattr(user, field) for field in PRINCIPAL_FIELDS}
+        self._store_local(user.id, data)
+        if self.shared_backend is not None:
+            await self.shared_backend.set(self._key(user.id), data, self.ttl)
+
+    async def invalidate(self, user_id: int) -> None:
+        """À appeler après réinitialisation du mot de passe, changement de rôle ou suppression"""
+        self._local.pop(user_id, None)
+        if self.shared_backend is not None:
+            await self.shared_backend.delete(self._key(user_id))
+
+    def stats(self) -> dict:
+        lookups = self.local_hits + self.shared_hits + self.misses
+        hits = self.local_hits + self.shared_hits
+        return {
+            "size": len(self._local),
+            "local_hits": self.local_hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def _store_local(self, user_id: int, data: dict) -> None:
+        self._local[user_id] = (data, time.monotonic() + self.ttl)
+        self._local.move_to_end(user_id)
+        while len(self._local) > self.maxsize:
+            self._local.popitem(last=False)
+
+    @staticmethod
+    def _to_user(data: dict) -> User:
+        # Instance transitoire (non attachée à une session) exposant les mêmes attributs
+        return User(**data)
+
+
+principal_cache = PrincipalCache(
+    maxsize=settings.PRINCIPAL_CACHE_MAXSIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    shared_backend=LocalSharedBackend() if settings.PRINCIPAL_CACHE_SHARED else None,
+)
@@ -14,6 +14,76 @@ class Settings(BaseSettings):
     MAIL_PORT: int = Field(..., env="MAIL_PORT")
     MAIL_SERVER: str = Field(..., env="MAIL_SERVER")
 
+    # Pool de connexions Postgres (asyncpg)
+    DB_POOL_SIZE: int = Field(default=10, env="DB_POOL_SIZE")
+    DB_MAX_OVERFLOW: int = Field(default=20, env="DB_MAX_OVERFLOW")
+    DB_POOL_TIMEOUT: float = Field(default=30.0, env="DB_POOL_TIMEOUT")
+    DB_POOL_RECYCLE: int = Field(default=1800, env="DB_POOL_RECYCLE")
+    DB_POOL_PRE_PING: bool = Field(default=True, env="DB_POOL_PRE_PING")
+    DB_STATEMENT_CACHE_SIZE: int = Field(default=100, env="DB_STATEMENT_CACHE_SIZE")
+
+    # Client MongoDB (Motor)
+    MONGO_MAX_POOL_SIZE: int = Field(default=100, env="MONGO_MAX_POOL_SIZE")
+    MONGO_MIN_POOL_SIZE: int = Field(default=0, env="MONGO_MIN_POOL_SIZE")
+    MONGO_CONNECT_TIMEOUT_MS: int = Field(default=10000, env="MONGO_CONNECT_TIMEOUT_MS")
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = Field(default=10000, env="MONGO_SERVER_SELECTION_TIMEOUT_MS")
+    MONGO_SOCKET_TIMEOUT_MS: int = Field(default=20000, env="MONGO_SOCKET_TIMEOUT_MS")
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: int = Field(default=5000, env="MONGO_WAIT_QUEUE_TIMEOUT_MS")
+    MONGO_READ_PREFERENCE: str = Field(default="primary", env="MONGO_READ_PREFERENCE")
+    MONGO_COMPRESSORS: str = Field(default="", env="MONGO_COMPRESSORS")  # ex: "zstd,snappy,zlib"
+
+    # Heartbeats de présence (écritures regroupées)
+    HEARTBEAT_FLUSH_SECONDS: float = Field(default=5.0, env="HEARTBEAT_FLUSH_SECONDS")
+    HEARTBEAT_FLUSH_MAX_ENTRIES: int = Field(default=1000, env="HEARTBEAT_FLUSH_MAX_ENTRIES")
+    HEARTBEAT_MAX_PENDING: int = Field(default=100000, env="HEARTBEAT_MAX_PENDING")
+    PRESENCE_MAX_TRACKED: int = Field(default=100000, env="PRESENCE_MAX_TRACKED")
+
+    # Compteur de vues des profils (deltas regroupés)
+    VIEW_COUNTER_FLUSH_SECONDS: float = Field(default=10.0, env="VIEW_COUNTER_FLUSH_SECONDS")
+    VIEW_COUNTER_FLUSH_MAX_ENTRIES: int = Field(default=1000, env="VIEW_COUNTER_FLUSH_MAX_ENTRIES")
+    VIEW_COUNTER_MAX_PENDING: int = Field(default=100000, env="VIEW_COUNTER_MAX_PENDING")
+
+    # Réparation périodique de events.comments_count
+    COMMENT_COUNT_RECONCILE_SECONDS: int = Field(default=3600, env="COMMENT_COUNT_RECONCILE_SECONDS")
+
+    # Blobs d'upload sans référence : fréquence de purge et délai de grâce
+    BLOB_GC_INTERVAL_SECONDS: int = Field(default=3600, env="BLOB_GC_INTERVAL_SECONDS")
+    BLOB_GC_GRACE_SECONDS: int = Field(default=600, env="BLOB_GC_GRACE_SECONDS")
+
+    # Accès disque des handlers async : threads dédiés et opérations simultanées admises
+    STORAGE_WORKERS: int = Field(default=4, env="STORAGE_WORKERS")
+    STORAGE_MAX_CONCURRENCY: int = Field(default=16, env="STORAGE_MAX_CONCURRENCY")
+
+    # Taille maximale d'un corps de requête (image de 5 Mo + champs du formulaire)
+    MAX_REQUEST_BODY_SIZE: int = Field(default=6 * 1024 * 1024, env="MAX_REQUEST_BODY_SIZE")
+
+    # Cache navigateur / CDN des fichiers statiques sans empreinte (les blobs sont immutables)
+    STATIC_MAX_AGE_SECONDS: int = Field(default=3600, env="STATIC_MAX_AGE_SECONDS")
+
+    # Hachage des mots de passe (bcrypt) : coût, threads dédiés, attente maximale
+    PASSWORD_BCRYPT_ROUNDS: int = Field(default=12, env="PASSWORD_BCRYPT_ROUNDS")
+    PASSWORD_HASH_WORKERS: int = Field(default=4, env="PASSWORD_HASH_WORKERS")
+    PASSWORD_HASH_MAX_QUEUE: int = Field(default=64, env="PASSWORD_HASH_MAX_QUEUE")
+
+    # Traitement des images (processus dédiés aux déclinaisons)
+    IMAGE_WORKERS: int = Field(default=2, env="IMAGE_WORKERS")
+
+    # Journalisation SQL
+    SQL_ECHO: bool = Field(default=False, env="SQL_ECHO")
+    SQL_LOG_SAMPLE_RATE: float = Field(default=0.0, env="SQL_LOG_SAMPLE_RATE")
+    SQL_SLOW_QUERY_MS: float = Field(default=200.0, env="SQL_SLOW_QUERY_MS")
+
+    # Journalisation applicative
+    LOG_LEVEL: str = Field(default="INFO", env="LOG_LEVEL")
+    LOG_FORMAT: str = Field(default="json", env="LOG_FORMAT")  # "json" ou "text"
+    LOG_LEVELS: str = Field(default="", env="LOG_LEVELS")  # ex: "app.sql=WARNING,app.auth=DEBUG"
+    LOG_SAMPLING: str = Field(default="", env="LOG_SAMPLING")  # ex: "app.auth.dependencies=0.01"
+
+    # Cache de l'utilisateur authentifié (get_current_user)
+    PRINCIPAL_CACHE_TTL_SECONDS: int = Field(default=60, env="PRINCIPAL_CACHE_TTL_SECONDS")
+    PRINCIPAL_CACHE_MAXSIZE: int = Field(default=10000, env="PRINCIPAL_CACHE_MAXSIZE")
+    PRINCIPAL_CACHE_SHARED: bool = Field(default=False, env="PRINCIPAL_CACHE_SHARED")
+
     class Config:
         env_file = ".env"
 
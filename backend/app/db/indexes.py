@@ -0,0 +1,150 @@
+# app/db/indexes.py - Déclaration, création et vérification des index MongoDB
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from app.db.mongo import db
+from app.users.search import SEARCH_INDEXES
+
+logger = logging.getLogger(__name__)
+
+# Index requis par collection (spécifications au format create_index)
+MONGO_INDEXES: Dict[str, List[Dict[str, Any]]] = {
+    "profiles": [
+        {"keys": [("user_id", ASCENDING)], "name": "user_id"},
+        {"keys": [("email", ASCENDING)], "name": "email", "sparse": True},
+        {"keys": [("phone", ASCENDING)], "name": "phone", "sparse": True},
+        {"keys": [("last_seen", ASCENDING)], "name": "last_seen"},
+        *SEARCH_INDEXES,
+    ],
+    "friendships": [
+        {"keys": [("sender_id", ASCENDING), ("receiver_id", ASCENDING)], "name": "sender_receiver"},
+        {"keys": [("receiver_id", ASCENDING), ("status", ASCENDING)], "name": "receiver_status"},
+    ],
+    "follows": [
+        {"keys": [("follower_id", ASCENDING), ("followee_id", ASCENDING)], "name": "follower_followee", "unique": True},
+        {"keys": [("followee_id", ASCENDING), ("_id", DESCENDING)], "name": "followee_recent"},
+        {"keys": [("follower_id", ASCENDING), ("_id", DESCENDING)], "name": "follower_recent"},
+    ],
+    "blobs": [
+        {"keys": [("refs", ASCENDING), ("updated_at", ASCENDING)], "name": "refs_updated_at"},
+    ],
+    "notifications": [
+        {"keys": [("user_id", ASCENDING), ("created_at", DESCENDING)], "name": "user_created_at"},
+    ],
+}
+
+# Formes de requêtes utilisées par l'application, vérifiées via explain()
+QUERY_SHAPES: Dict[str, List[Dict[str, Any]]] = {
+    "profiles": [
+        {"user_id": 0},
+        {"user_id": {"$in": [0]}},
+        {"email": ""},
+        {"phone": ""},
+        {"last_seen": {"$lt": 0}},
+    ],
+}
+
+
+def _index_model(spec: Dict[str, Any]) -> IndexModel:
+    options = {k: v for k, v in spec.items() if k != "keys"}
+    return IndexModel(spec["keys"], background=True, **options)
+
+
+def _key_spec(keys) -> tuple:
+    """Forme normalisée d'une clé d'index (1 et 1.0 comparés égaux)"""
+    return tuple(
+        (field, int(direction) if isinstance(direction, (int, float)) else direction)
+        for field, direction in keys
+    )
+
+
+def _existing_key_spec(info: Dict[str, Any]) -> tuple:
+    """
+    Clé d'un index tel que renvoyé par index_information() ; un index texte
+    y apparaît comme _fts/_ftsx, on le reconstruit à partir de ses poids.
+    """
+    key = info["key"]
+    if any(field == "_fts" for field, _ in key):
+        text_fields = [(field, "text") for field in sorted(info.get("weights", {}))]
+        prefix = [(field, d) for field, d in key if field not in ("_fts", "_ftsx")]
+        return _key_spec(prefix + text_fields)
+    return _key_spec(key)
+
+
+async def ensure_indexes(collections: Optional[Iterable[str]] = None) -> None:
+    """
+    Crée les index manquants (idempotent : les index existants sont ignorés).
+    Un index est considéré présent si son nom ou sa clé existe déjà ; un nom
+    existant avec une clé différente est signalé sans être modifié. Les index
+    sont créés un par un pour qu'un conflit n'empêche pas les suivants.
+    `collections` limite la création à certaines collections.
+    """
+    for collection_name, specs in MONGO_INDEXES.items():
+        if collections is not None and collection_name not in collections:
+            continue
+        collection = db[collection_name]
+        existing = await collection.index_information()
+        existing_keys = {_existing_key_spec(info): name for name, info in existing.items()}
+
+        for spec in specs:
+            wanted = _key_spec(spec["keys"])
+            if spec["name"] in existing:
+                if _existing_key_spec(existing[spec["name"]]) != wanted:
+                    logger.error(
+                        f"Index {collection_name}.{spec['name']} existant avec une clé différente "
+                        f"de {list(wanted)} : à corriger manuellement"
+                    )
+                continue
+            if wanted in existing_keys:
+                logger.warning(
+                    f"Index {collection_name}.{spec['name']} déjà présent sous le nom "
+                    f"{existing_keys[wanted]}"
+                )
+                continue
+            try:
+                created = await collection.create_indexes([_index_model(spec)])
+                logger.info(f"Index créés sur {collection_name}: {created}")
+            except Exception as e:
+                logger.error(f"Erreur création de l'index {collection_name}.{spec['name']}: {e}")
+
+
+def _stages(plan: Dict[str, Any]):
+    """Parcourt récursivement les étapes d'un plan d'exécution"""
+    if not isinstance(plan, dict):
+        return
+    if "stage" in plan:
+        yield plan["stage"]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            yield from _stages(plan[key])
+    for child in plan.get("inputStages", []):
+        yield from _stages(child)
+
+
+async def find_collection_scans() -> List[Dict[str, Any]]:
+    """
+    Exécute explain() sur chaque forme de requête déclarée et retourne
+    celles dont le plan gagnant retombe sur un COLLSCAN.
+    """
+    scans = []
+    for collection_name, shapes in QUERY_SHAPES.items():
+        collection = db[collection_name]
+        for shape in shapes:
+            try:
+                explanation = await collection.find(shape).explain()
+            except Exception as e:
+                logger.warning(f"explain() impossible sur {collection_name} {shape}: {e}")
+                continue
+            winning_plan = explanation.get("queryPlanner", {}).get("winningPlan", {})
+            if "COLLSCAN" in set(_stages(winning_plan)):
+                logger.warning(f"COLLSCAN détecté: {collection_name} {shape}")
+                scans.append({"collection": collection_name, "filter": shape})
+    return scans
+
+
+async def bootstrap_indexes() -> None:
+    """Tâche de démarrage : crée les index puis signale les requêtes non indexées"""
+    await ensure_indexes()
+    await find_collection_scans()
@@ -0,0 +1,127 @@
+# app/db/instrumentation.py - Instrumentation des requêtes SQL (événements SQLAlchemy)
+import functools
+import logging
+import random
+import re
+import threading
+import time
+from typing import Dict, List
+
+from sqlalchemy import event
+
+logger = logging.getLogger("app.sql")
+
+# Bornes supérieures (ms) des classes de l'histogramme des durées
+LATENCY_BUCKETS_MS = (1, 5, 10, 50, 100, 250, 500, 1000, 5000, float("inf"))
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_BIND_PARAM = re.compile(r"\$\d+|%\(\w+\)s|%s|(?<!:):(?!:)\w+")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*\?\s*,?)+\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+# Les requêtes générées par l'ORM forment un ensemble fini : l'empreinte est
+# mise en cache pour ne pas rejouer les regex à chaque exécution
+FINGERPRINT_CACHE_SIZE = 2048
+
+
+@functools.lru_cache(maxsize=FINGERPRINT_CACHE_SIZE)
+def fingerprint(statement: str) -> str:
+    """Normalise une requête : littéraux et paramètres remplacés par ?, listes IN réduites"""
+    text = _STRING_LITERAL.sub("?", statement)
+    text = _BIND_PARAM.sub("?", text)
+    text = _NUMBER_LITERAL.sub("?", text)
+    text = _IN_LIST.sub("IN (?)", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class QueryStats:
+    """Agrégats par empreinte : nombre d'appels, durées, lignes et histogramme"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, dict] = {}
+
+    def record(self, statement: str, duration_ms: float, rowcount: int) -> None:
+        key = fingerprint(statement)
+        with self._lock:
+            entry = self._stats.get(key)
+            if entry is None:
+                entry = {
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "rows": 0,
+                    "histogram": [0] * len(LATENCY_BUCKETS_MS),
+                }
+                self._stats[key] = entry
+            entry["count"] += 1
+            entry["total_ms"] += duration_ms
+            entry["max_ms"] = max(entry["max_ms"], duration_ms)
+            if rowcount and rowcount > 0:
+                entry["rows"] += rowcount
+            for i, bound in enumerate(LATENCY_BUCKETS_MS):
+                if duration_ms <= bound:
+                    entry["histogram"][i] += 1
+                    break
+
+    def top(self, limit: int = 20, order_by: str = "max_ms") -> List[dict]:
+        with self._lock:
+            items = [
+                {
+                    "fingerprint": key,
+                    "count": entry["count"],
+                    "total_ms": round(entry["total_ms"], 2),
+                    "avg_ms": round(entry["total_ms"] / entry["count"], 2),
+                    "max_ms": round(entry["max_ms"], 2),
+                    "rows": entry["rows"],
+                    "histogram": dict(zip(
+                        [str(b) for b in LATENCY_BUCKETS_MS], entry["histogram"]
+                    )),
+                }
+                for key, entry in self._stats.items()
+            ]
+        items.sort(key=lambda item: item[order_by], reverse=True)
+        return items[:limit]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+query_stats = QueryStats()
+
+
+def instrument_engine(engine, sample_rate: float = 0.0, slow_query_ms: float = 200.0) -> None:
+    """
+    Branche l'instrumentation sur un moteur (sync ou async).
+    Chaque requête est agrégée dans query_stats ; le log est échantillonné
+    (sample_rate) sauf pour les requêtes lentes, toujours journalisées.
+    """
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info["query_start_time"].pop()
+        duration_ms = (time.perf_counter() - start) * 1000
+        rowcount = getattr(cursor, "rowcount", -1)
+        query_stats.record(statement, duration_ms, rowcount)
+
+        if duration_ms >= slow_query_ms:
+            logger.warning(f"Requête lente ({duration_ms:.1f} ms, rows={rowcount}): {fingerprint(statement)}")
+        elif sample_rate and random.random() < sample_rate:
+            logger.info(f"SQL ({duration_ms:.1f} ms, rows={rowcount}): {fingerprint(statement)}")
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _handle_error(context):
+        # after_cursor_execute n'est pas appelé si la requête échoue : on retire
+        # le départ empilé pour que la pile reste alignée sur la connexion
+        conn = context.connection
+        if conn is not None and context.cursor is not None:
+            starts = conn.info.get("query_start_time")
+            if starts:
+                starts.pop()
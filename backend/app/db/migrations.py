@@ -0,0 +1,50 @@
+# app/db/migrations.py - Migrations de données MongoDB exécutées une seule fois (tous workers confondus)
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
+
+from pymongo.errors import DuplicateKeyError
+
+from app.db.mongo import migrations_collection
+
+logger = logging.getLogger(__name__)
+
+# Au-delà, un verrou « running » est considéré abandonné (worker arrêté en cours de route)
+STALE_LOCK_AFTER = timedelta(hours=1)
+
+
+async def _acquire(name: str) -> bool:
+    now = datetime.utcnow()
+    try:
+        await migrations_collection.insert_one({"_id": name, "state": "running", "started_at": now})
+        return True
+    except DuplicateKeyError:
+        pass
+
+    # Reprise d'un verrou abandonné ; une migration terminée (« done ») n'est jamais relancée
+    taken = await migrations_collection.find_one_and_update(
+        {"_id": name, "state": "running", "started_at": {"$lt": now - STALE_LOCK_AFTER}},
+        {"$set": {"started_at": now}},
+    )
+    return taken is not None
+
+
+async def run_once(name: str, job: Callable[[], Awaitable[object]]) -> bool:
+    """
+    Exécute job() si aucune autre instance ne l'a fait ou ne le fait déjà.
+    Le document migrations/{name} sert de verrou puis de trace ; en cas d'échec
+    il est supprimé pour que le prochain démarrage réessaie.
+    Retourne True si job() a été exécuté ici.
+    """
+    if not await _acquire(name):
+        return False
+    try:
+        result = await job()
+    except Exception:
+        await migrations_collection.delete_one({"_id": name})
+        raise
+    await migrations_collection.update_one(
+        {"_id": name},
+        {"$set": {"state": "done", "finished_at": datetime.utcnow(), "result": result}},
+    )
+    return True
@@ -1,8 +1,27 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from app.config import settings
+from app.db.mongo_metrics import command_latency
+
+
+def create_mongo_client() -> AsyncIOMotorClient:
+    """Client MongoDB asynchrone configuré depuis Settings (pool, timeouts, compression)"""
+    options = {
+        "maxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGO_MIN_POOL_SIZE,
+        "connectTimeoutMS": settings.MONGO_CONNECT_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "socketTimeoutMS": settings.MONGO_SOCKET_TIMEOUT_MS,
+        "waitQueueTimeoutMS": settings.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "readPreference": settings.MONGO_READ_PREFERENCE,
+        "event_listeners": [command_latency],
+    }
+    if settings.MONGO_COMPRESSORS:
+        options["compressors"] = settings.MONGO_COMPRESSORS
+    return AsyncIOMotorClient(settings.MONGO_URL, **options)
+
 
 # Client MongoDB asynchrone
-client = AsyncIOMotorClient(settings.MONGO_URL)
+client = create_mongo_client()
 db = client[settings.MONGO_DB]
 
 # Collections
@@ -15,3 +34,6 @@ notifications_collection = db["notifications"]
 wishlists_collection = db["wishlists"]
 media_collection = db["media"]
 reminders_collection = db["reminders"]
+follows_collection = db["follows"]
+migrations_collection = db["migrations"]  # verrous / trace des migrations de données
+blobs_collection = db["blobs"]  # index des uploads : digest -> chemin, nombre de références
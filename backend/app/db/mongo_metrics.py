@@ -0,0 +1,82 @@
+# app/db/mongo_metrics.py - Latence des commandes MongoDB (pymongo CommandListener)
+import threading
+from typing import Dict, List, Tuple
+
+from pymongo import monitoring
+
+from app.db.instrumentation import LATENCY_BUCKETS_MS
+
+
+class CommandLatencyListener(monitoring.CommandListener):
+    """Histogrammes de latence par (collection, commande)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[int, int], Tuple[str, str]] = {}
+        self._stats: Dict[Tuple[str, str], dict] = {}
+
+    def started(self, event):
+        if event.command_name == "getMore":
+            # getMore porte l'id du curseur ; la collection est dans le champ "collection"
+            collection = event.command.get("collection")
+        else:
+            collection = event.command.get(event.command_name)
+        if not isinstance(collection, str):
+            collection = "-"
+        with self._lock:
+            self._pending[(event.request_id, event.operation_id or 0)] = (collection, event.command_name)
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
+
+    def _finish(self, event, failed: bool) -> None:
+        duration_ms = event.duration_micros / 1000
+        with self._lock:
+            key = self._pending.pop(
+                (event.request_id, event.operation_id or 0),
+                ("-", event.command_name)
+            )
+            entry = self._stats.get(key)
+            if entry is None:
+                entry = {
+                    "count": 0,
+                    "failures": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "histogram": [0] * len(LATENCY_BUCKETS_MS),
+                }
+                self._stats[key] = entry
+            entry["count"] += 1
+            entry["failures"] += int(failed)
+            entry["total_ms"] += duration_ms
+            entry["max_ms"] = max(entry["max_ms"], duration_ms)
+            for i, bound in enumerate(LATENCY_BUCKETS_MS):
+                if duration_ms <= bound:
+                    entry["histogram"][i] += 1
+                    break
+
+    def snapshot(self) -> List[dict]:
+        with self._lock:
+            items = [
+                {
+                    "collection": collection,
+                    "command": command,
+                    "count": entry["count"],
+                    "failures": entry["failures"],
+                    "avg_ms": round(entry["total_ms"] / entry["count"], 3),
+                    "max_ms": round(entry["max_ms"], 3),
+                    "total_ms": round(entry["total_ms"], 2),
+                    "histogram": dict(zip(
+                        [str(b) for b in LATENCY_BUCKETS_MS], entry["histogram"]
+                    )),
+                }
+                for (collection, command), entry in self._stats.items()
+            ]
+        items.sort(key=lambda item: item["total_ms"], reverse=True)
+        return items
+
+
+command_latency = CommandLatencyListener()
@@ -1,19 +1,27 @@
+from functools import lru_cache
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
-import os
-from dotenv import load_dotenv
+from sqlalchemy.orm import sessionmaker
 
-load_dotenv()
+from app.db.session import Base, POSTGRES_URL
+from app.db.pool import InstrumentedQueuePool, pool_options
 
-POSTGRES_URL = os.getenv("POSTGRES_URL")
+# Moteur synchrone (psycopg2) créé à la demande seulement : l'application
+# utilise le moteur async de app.db.session, ceci reste pour les scripts.
 
-engine = create_engine(POSTGRES_URL, echo=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
+@lru_cache(maxsize=1)
+def get_sync_engine():
+    url_sync = POSTGRES_URL.replace("postgresql+asyncpg://", "postgresql://")
+    return create_engine(url_sync, echo=False, poolclass=InstrumentedQueuePool, **pool_options())
+
+
+@lru_cache(maxsize=1)
+def get_session_factory():
+    return sessionmaker(autocommit=False, autoflush=False, bind=get_sync_engine())
+
 
 def get_postgres_db():
-    db = SessionLocal()
+    db = get_session_factory()()
     try:
         yield db
     finally:
@@ -6,12 +6,10 @@ from typing import Optional, List
 from datetime import datetime
 import logging
 import json
-import os
-import shutil
 from pydantic import ValidationError
 
 from app.db.session import get_db
-from app.events.services import EventService, EventNotFoundError, EventFullError, PermissionError
+from app.events.services import EventService, EventNotFoundError, EventFullError, PermissionError, InvalidCursorError
 from .schemas import (
     EventCreate, EventUpdate, EventFilters, EventResponse, OrganizerOut,
     EventListResponse, ParticipationResponse, ErrorResponse, EventCommentResponse, EventCommentCreate
@@ -20,6 +18,12 @@ from app.auth.schemas import UserSchema
 from app.auth.dependencies import get_current_user, get_current_user_optional
 from app.events.models import Event, EventComment
 from app.db.mongo import profiles_collection
+from app.utils.serialization import FastJSONResponse
+from app.utils.uploads import UploadTooLargeError
+from app.utils.image_variants import ensure_variants
+from app.utils import blob_store
+
+MAX_EVENT_IMAGE_SIZE = 5 * 1024 * 1024  # 5MB
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -61,28 +65,39 @@ async def create_event(
 
         # Image processing
         image_path = None
+        image_variants = {}
         if image and image.filename:
-            upload_dir = "static/uploads/events"
-            os.makedirs(upload_dir, exist_ok=True)
-            timestamp = int(datetime.now().timestamp())
             ext = image.filename.split('.')[-1] if '.' in image.filename else 'jpg'
-            filename = f"event_{current_user.id}_{timestamp}.{ext}"
-            image_path = os.path.join(upload_dir, filename)
-            image_path = image_path.replace("\\", "/")
 
-            with open(image_path, "wb") as buffer:
-                shutil.copyfileobj(image.file, buffer)
+            # Blob adressé par contenu, partagé avec les autres uploads identiques
+            try:
+                blob = await blob_store.store_upload(image, ext, max_size=MAX_EVENT_IMAGE_SIZE)
+            except UploadTooLargeError:
+                raise HTTPException(status_code=413, detail="Image too large")
 
+            image_path = blob.path.as_posix()
             logger.info(f"Image saved: {image_path}")
 
-        # Prepare final data
-        event_data_dict = event.dict()
-        if image_path:
-            event_data_dict['image'] = image_path
+        # La référence prise par store_upload est rendue si quoi que ce soit
+        # échoue avant que l'événement ne soit enregistré
+        try:
+            if image_path:
+                image_variants = await ensure_variants(blob.path)
+
+            # Prepare final data
+            event_data_dict = event.dict()
+            if image_path:
+                event_data_dict['image'] = image_path
+            if image_variants:
+                event_data_dict['image_variants'] = image_variants
 
-        # Creation via service
-        event_service = EventService(db)
-        db_event = await event_service.create_event(event_data_dict, current_user.id)
+            # Creation via service
+            event_service = EventService(db)
+            db_event = await event_service.create_event(event_data_dict, current_user.id)
+        except BaseException:
+            if image_path:
+                await blob_store.release(image_path)
+            raise
         db_event = await get_event_with_relations(db, db_event.id)
 
         # Retrieve avatar from MongoDB profile
@@ -98,6 +113,7 @@ async def create_event(
             category=db_event.category,
             price=db_event.price,
             image=db_event.image,
+            image_variants=db_event.image_variants,
             is_public=db_event.is_public,
             allow_comments=db_event.allow_comments,
             allow_sharing=db_event.allow_sharing,
@@ -118,6 +134,9 @@ async def create_event(
             comments_count=db_event.comments_count or 0,  # <-- Ajout ici
         )
 
+    except HTTPException:
+        raise
+
     except json.JSONDecodeError as e:
         logger.error(f"JSON decode error: {e}, raw data: {event_data}")
         raise HTTPException(status_code=422, detail=f"Invalid JSON format: {str(e)}")
@@ -143,6 +162,10 @@ async def get_events(
     date_to: Optional[datetime] = Query(None, description="End date"),
     organizer_id: Optional[int] = Query(None, description="Organizer ID"),
     search: Optional[str] = Query(None, description="Text search"),
+    pagination: str = Query("offset", regex="^(offset|cursor)$", description="Pagination mode"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor returned as next_cursor"),
+    count: Optional[str] = Query(None, regex="^(exact|estimate|none)$", description="Total count mode (default: exact with offset, none with cursor)"),
+    sort: str = Query("date", regex="^(date|relevance)$", description="Sort order (relevance requires search)"),
     db: AsyncSession = Depends(get_db),
     current_user: Optional[UserSchema] = Depends(get_current_user_optional)
 ):
@@ -161,10 +184,19 @@ async def get_events(
                 search=search
             )
 
-        result = await service.get_events(page, per_page, filters, user_id)
+        result = await service.get_events(
+            page, per_page, filters, user_id,
+            cursor=cursor,
+            cursor_mode=pagination == "cursor",
+            count=count,
+            sort=sort
+        )
 
-        return EventListResponse(**result)
+        # Dictionnaires construits par le service : encodés directement, sans revalidation
+        return FastJSONResponse(result)
 
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     except Exception as e:
         logger.error(f"Error retrieving event list: {e}")
         raise HTTPException(
@@ -181,8 +213,8 @@ async def create_comment(
 ):
     try:
         # Vérifier que l'événement existe
-        event = await db.get(Event, event_id)
-        if not event:
+        event_exists = await db.scalar(select(Event.id).where(Event.id == event_id))
+        if not event_exists:
             raise HTTPException(status_code=404, detail="Event not found")
 
         # Créer le commentaire
@@ -192,28 +224,25 @@ async def create_comment(
             event_id=event_id,
             author_id=current_user.id,
         )
+        # events.comments_count est incrémenté par le trigger trg_event_comments_count
         db.add(db_comment)
 
-        # Incrémenter le compteur de commentaires de l'événement
-        event.comments_count = (event.comments_count or 0) + 1
-        db.add(event)
-
         # Valider les changements en base
         await db.commit()
         await db.refresh(db_comment)
 
-        # Recharger avec les relations pour la réponse
-        result = await db.execute(
-            select(EventComment)
-            .where(EventComment.id == db_comment.id)
-            .options(
-                selectinload(EventComment.replies),
-                selectinload(EventComment.parent)
-            )
+        # Un commentaire tout juste créé n'a pas encore de réponses
+        return EventCommentResponse(
+            id=db_comment.id,
+            content=db_comment.content,
+            created_at=db_comment.created_at,
+            updated_at=db_comment.updated_at,
+            event_id=db_comment.event_id,
+            author_id=db_comment.author_id,
+            parent_id=db_comment.parent_id,
+            full_name=f"{current_user.first_name or ''} {current_user.last_name or ''}".strip() or "Anonyme",
+            replies=[]
         )
-        db_comment_full = result.scalars().first()
-
-        return db_comment_full
 
     except Exception as e:
         logger.error(f"Error creating comment: {e}")
@@ -222,26 +251,16 @@ async def create_comment(
             detail="Internal error while creating the comment"
         )
 
-def build_comment_response(comment: EventComment) -> EventCommentResponse:
-    return EventCommentResponse(
-        id=comment.id,
-        event_id=comment.event_id,
-        author_id=comment.author_id,
-        content=comment.content,
-        created_at=comment.created_at,
-        updated_at=comment.updated_at,
-        replies=[build_comment_response(reply) for reply in comment.replies] if comment.replies else []
-    )
-
 @router.get("/events/{event_id}/comments/", response_model=List[EventCommentResponse])
 async def read_comments(
     event_id: int,
+    max_depth: Optional[int] = Query(None, ge=0, description="Profondeur maximale des réponses"),
     db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_user_optional)  # optionnel si tu veux vérifier auth
 ):
     event_service = EventService(db)
     try:
-        comments = await event_service.get_comments(event_id)
+        comments = await event_service.get_comments(event_id, max_depth)
         return comments
 
     except EventNotFoundError:
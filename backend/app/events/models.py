@@ -1,7 +1,8 @@
 from sqlalchemy import (
-    Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Table, TIMESTAMP
+    Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Table, TIMESTAMP, Computed, Index, DDL, event
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import TSVECTOR, JSONB
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 from enum import Enum
 from app.db.session import Base
@@ -42,6 +43,7 @@ class Event(Base):
     category = Column(String(20), nullable=False, index=True)
     price = Column(String(50), default="Gratuit")
     image = Column(String(500), nullable=True)
+    image_variants = Column(JSONB, nullable=True)  # {"thumb": ..., "list": ..., "full": ...}
 
     is_public = Column(Boolean, default=True, index=True)
     allow_comments = Column(Boolean, default=True)
@@ -50,6 +52,17 @@ class Event(Base):
 
     comments_count = Column(Integer, default=0)  # ✅ AJOUT ICI
 
+    # Vecteur plein texte généré par Postgres (titre pondéré A, description B).
+    # Différé : il ne sert qu'aux filtres et au tri, pas aux réponses
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(description, '')), 'B')",
+            persisted=True
+        )
+    ))
+
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
@@ -65,6 +78,18 @@ class Event(Base):
     comments = relationship("EventComment", back_populates="event", cascade="all, delete-orphan")
     activities = relationship("EventActivity", back_populates="event", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Keyset (date, id) : pagination par curseur et tri par date sans tri de la table
+        Index("ix_events_date_id", "date", "id"),
+        Index("ix_events_search_vector", "search_vector", postgresql_using="gin"),
+        # Trigram : sert les filtres ILIKE '%x%' sur location (extension pg_trgm)
+        Index(
+            "ix_events_location_trgm", "location",
+            postgresql_using="gin",
+            postgresql_ops={"location": "gin_trgm_ops"}
+        ),
+    )
+
     
     def __repr__(self):
         return f"<Event(id={self.id}, title='{self.title}', date='{self.date}')>"
@@ -79,6 +104,15 @@ class Event(Base):
             return False
         return self.participant_count >= self.max_attendees
 
+# L'index trigram sur location requiert pg_trgm : create_all (create_tables.py)
+# doit créer l'extension avant la table, comme le fait la migration Alembic
+event.listen(
+    Event.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
+
+
 class EventComment(Base):
     __tablename__ = "event_comments"
 
@@ -87,13 +121,13 @@ class EventComment(Base):
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
-    event_id = Column(Integer, ForeignKey('events.id'), nullable=False)
+    event_id = Column(Integer, ForeignKey('events.id'), nullable=False, index=True)
     event = relationship("Event", back_populates="comments")
 
     author_id = Column(Integer, ForeignKey('users.id'), nullable=False)
     author = relationship("User", back_populates="comments")
 
-    parent_id = Column(Integer, ForeignKey('event_comments.id'), nullable=True)
+    parent_id = Column(Integer, ForeignKey('event_comments.id', ondelete="CASCADE"), nullable=True, index=True)
     parent = relationship(
         "EventComment",
         remote_side=[id],
@@ -105,12 +139,41 @@ class EventComment(Base):
         back_populates="parent",
         cascade="all, delete-orphan",
         foreign_keys=[parent_id],
-        lazy="selectin"
+        # Les fils sont chargés en une requête par EventService.get_comments : tout
+        # accès paresseux lève une erreur, la suppression en cascade est faite
+        # par Postgres (ON DELETE CASCADE) sans charger les réponses
+        lazy="raise",
+        passive_deletes=True
     )
 
     def __repr__(self):
         return f"<EventComment(id={self.id}, event_id={self.event_id}, author_id={self.author_id})>"
 
+
+# Maintien atomique de events.comments_count (insertion et suppression, y compris en cascade)
+COMMENTS_COUNT_TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION event_comments_count() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE events SET comments_count = COALESCE(comments_count, 0) + 1 WHERE id = NEW.event_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE events SET comments_count = GREATEST(COALESCE(comments_count, 0) - 1, 0) WHERE id = OLD.event_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+COMMENTS_COUNT_TRIGGER = """
+CREATE TRIGGER trg_event_comments_count
+AFTER INSERT OR DELETE ON event_comments
+FOR EACH ROW EXECUTE FUNCTION event_comments_count()
+"""
+
+# Installé aussi par create_all (create_tables.py) ; la migration 5e2a8c1f7b64 le fait pour les bases existantes
+event.listen(EventComment.__table__, "after_create", DDL(COMMENTS_COUNT_TRIGGER_FUNCTION).execute_if(dialect="postgresql"))
+event.listen(EventComment.__table__, "after_create", DDL(COMMENTS_COUNT_TRIGGER).execute_if(dialect="postgresql"))
+
         
 class EventActivity(Base):
     __tablename__ = "event_activities"
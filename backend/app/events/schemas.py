@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, validator, ConfigDict
-from typing import List, Optional
+from typing import List, Optional, Dict
 from datetime import datetime, timezone
 from enum import Enum
 from typing import ForwardRef
@@ -113,7 +113,8 @@ class EventUpdate(BaseModel):
             raise ValueError("La date de l'événement doit être dans le futur")
         return v
 
-class EventResponse(BaseModel):
+class EventSummary(BaseModel):
+    """Projection légère pour les listes : compteurs agrégés, sans la relation participants"""
     id: int
     title: str
     description: str
@@ -122,6 +123,7 @@ class EventResponse(BaseModel):
     category: str
     price: Optional[str]
     image: Optional[str]
+    image_variants: Optional[Dict[str, str]] = None
     is_public: bool
     allow_comments: bool
     allow_sharing: bool
@@ -135,16 +137,20 @@ class EventResponse(BaseModel):
     comments_count: int
     model_config = ConfigDict(from_attributes=True)
 
+class EventResponse(EventSummary):
+    pass
+
 class EventWithDetails(EventResponse):
     participants: List[OrganizerOut] = []
     comments: List[EventCommentResponse] = []
 
 class EventListResponse(BaseModel):
-    events: List[EventResponse]
-    total: int
+    events: List[EventSummary]
+    total: Optional[int] = None
     page: int
     per_page: int
-    pages: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 class EventFilters(BaseModel):
     category: Optional[EventCategory] = None
@@ -1,13 +1,16 @@
+import asyncio
 import logging
+import base64
+import re
 from datetime import datetime, timezone
-from typing import Optional, List
-from sqlalchemy import select, or_, func
+from typing import Optional, List, Tuple
+from sqlalchemy import select, func, text, tuple_, literal
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, joinedload
 import json
-from app.db.mongo import profiles_collection
+from app.users.services import get_avatar_map
 from app.auth.schemas import UserSchema
-from app.events.models import Event, EventCategory, EventActivity, EventComment
+from app.events.models import Event, EventCategory, EventActivity, EventComment, event_participants
 from app.events.schemas import (
     EventCreate,
     EventFilters,
@@ -20,6 +23,13 @@ from app.events.schemas import (
 
 logger = logging.getLogger(__name__)
 
+
+def _public_image_path(path: Optional[str]) -> Optional[str]:
+    if path and path.startswith("static/"):
+        return path[len("static/"):]
+    return path
+
+
 class EventNotFoundError(Exception):
     pass
 
@@ -29,6 +39,33 @@ class EventFullError(Exception):
 class PermissionError(Exception):
     pass
 
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(date: datetime, event_id: int) -> str:
+    """Curseur opaque (date, id) pour la pagination keyset"""
+    raw = json.dumps({"d": date.isoformat(), "i": event_id})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(data["d"]), int(data["i"])
+    except Exception:
+        raise InvalidCursorError("Invalid cursor")
+
+
+def build_prefix_tsquery(search: str) -> Optional[str]:
+    """Transforme une saisie libre en tsquery préfixée (ex. "anniv paris" -> anniv:* & paris:*)"""
+    terms = re.findall(r"\w+", search.lower())
+    if not terms:
+        return None
+    return " & ".join(f"{term}:*" for term in terms)
+
+
 class EventService:
     def __init__(self, db: AsyncSession):
         self.db = db
@@ -75,6 +112,7 @@ class EventService:
                 category=event_dict['category'],
                 price=event_dict.get('price', 'Gratuit')[:50],
                 image=event_dict.get('image', None),
+                image_variants=event_dict.get('image_variants', None),
                 is_public=event_dict.get('is_public', True),
                 allow_comments=event_dict.get('allow_comments', True),
                 allow_sharing=event_dict.get('allow_sharing', True),
@@ -116,31 +154,51 @@ class EventService:
         page: int = 1,
         per_page: int = 20,
         filters: Optional[EventFilters] = None,
-        current_user_id: Optional[int] = None
+        current_user_id: Optional[int] = None,
+        cursor: Optional[str] = None,
+        cursor_mode: bool = False,
+        count: Optional[str] = None,
+        sort: str = "date"
     ) -> dict:
+        """
+        Liste paginée des événements.
+        - mode offset (par défaut) : page / per_page
+        - mode curseur (cursor_mode ou cursor fourni) : keyset sur (date, id), renvoie next_cursor
+        - count : "exact", "estimate" (statistiques Postgres, sans filtre uniquement :
+          None sinon) ou "none" ; par défaut "none" en mode curseur, "exact" en mode offset
+        - sort : "relevance" trie par ts_rank quand une recherche est fournie (mode offset)
+        """
         offset = (page - 1) * per_page
-
-        # Sous-requête qui compte les commentaires par event_id
-        comment_count_subq = (
+        cursor_mode = cursor_mode or cursor is not None
+        if count is None:
+            # Défilement par curseur : pas de COUNT(*) à chaque page
+            count = "none" if cursor_mode else "exact"
+
+        # Sous-requête qui compte les participants par event_id
+        # (évite de charger toutes les lignes User juste pour un len())
+        participant_count_subq = (
             select(
-                EventComment.event_id,
-                func.count(EventComment.id).label("comments_count")
+                event_participants.c.event_id,
+                func.count(event_participants.c.user_id).label("participant_count")
             )
-            .group_by(EventComment.event_id)
+            .group_by(event_participants.c.event_id)
             .subquery()
         )
 
         # Join entre Event et cette sous-requête
+        # (comments_count est une colonne dénormalisée, maintenue par trigger)
         query = (
-            select(Event, comment_count_subq.c.comments_count)
-            .outerjoin(comment_count_subq, Event.id == comment_count_subq.c.event_id)
-            .options(
-                selectinload(Event.organizer),
-                selectinload(Event.participants)
+            select(
+                Event,
+                Event.comments_count,
+                participant_count_subq.c.participant_count
             )
+            .outerjoin(participant_count_subq, Event.id == participant_count_subq.c.event_id)
+            .options(selectinload(Event.organizer))
         )
 
         # Appliquer filtres existants
+        ts_query = None
         if filters:
             if filters.category:
                 query = query.where(Event.category == filters.category)
@@ -153,33 +211,56 @@ class EventService:
             if filters.organizer_id:
                 query = query.where(Event.organizer_id == filters.organizer_id)
             if filters.search:
-                search = f"%{filters.search}%"
-                query = query.where(
-                    or_(
-                        Event.title.ilike(search),
-                        Event.description.ilike(search)
-                    )
-                )
-
-        count_query = query.with_only_columns(func.count(Event.id)).order_by(None)
-        total_result = await self.db.execute(count_query)
-        total_events = total_result.scalar_one()
-
-        query = query.offset(offset).limit(per_page)
+                prefix_query = build_prefix_tsquery(filters.search)
+                if prefix_query:
+                    # Servi par l'index GIN ix_events_search_vector
+                    ts_query = func.to_tsquery("simple", prefix_query)
+                    query = query.where(Event.search_vector.op("@@")(ts_query))
+
+        total_events = None
+        if count == "estimate":
+            # reltuples ne vaut que pour la table entière : pas d'estimation filtrée
+            if not filters:
+                total_events = await self._estimate_event_count()
+        elif count == "exact":
+            count_query = query.with_only_columns(func.count(Event.id)).order_by(None)
+            total_result = await self.db.execute(count_query)
+            total_events = total_result.scalar_one()
+
+        if cursor_mode:
+            query = query.order_by(Event.date.asc(), Event.id.asc())
+            if cursor:
+                cursor_date, cursor_id = decode_cursor(cursor)
+                query = query.where(tuple_(Event.date, Event.id) > tuple_(cursor_date, cursor_id))
+            # Une ligne de plus pour savoir s'il existe une page suivante
+            query = query.limit(per_page + 1)
+        else:
+            if sort == "relevance" and ts_query is not None:
+                query = query.order_by(func.ts_rank(Event.search_vector, ts_query).desc(), Event.id.asc())
+            else:
+                # Ordre stable entre les pages, servi par ix_events_date_id
+                query = query.order_by(Event.date.asc(), Event.id.asc())
+            query = query.offset(offset).limit(per_page)
         result = await self.db.execute(query)
 
-        # Chaque résultat est un tuple (Event, comments_count)
+        # Chaque résultat est un tuple (Event, comments_count, participant_count)
         rows = result.all()
-        total_pages = (total_events + per_page - 1) // per_page
+        next_cursor = None
+        if cursor_mode and len(rows) > per_page:
+            rows = rows[:per_page]
+            last_event = rows[-1][0]
+            next_cursor = encode_cursor(last_event.date, last_event.id)
+
+        total_pages = None
+        if total_events is not None:
+            total_pages = (total_events + per_page - 1) // per_page
         serialized = []
 
-        for event, comments_count in rows:
-            print(f"Event {event.id} has {comments_count or 0} comments")
-            profile = await profiles_collection.find_one(
-                {"user_id": event.organizer.id},
-                {"_id": 0, "avatar_url": 1}
-            )
-            avatar_url = profile["avatar_url"] if profile and "avatar_url" in profile else None
+        # Avatars des organisateurs de la page : une seule requête Mongo ($in)
+        avatar_map = await get_avatar_map(event.organizer_id for event, _, _ in rows)
+
+        for event, comments_count, participant_count in rows:
+            avatar_url = avatar_map.get(event.organizer.id)
             organizer_data = {
                 "id": event.organizer.id,
                 "email": event.organizer.email or "",
@@ -189,14 +270,16 @@ class EventService:
                 "phone": getattr(event.organizer, 'phone', None),
                 "avatar_url": avatar_url
             }
-            participant_count = len(event.participants)
+            participant_count = participant_count or 0
             is_full = (
                 event.max_attendees is not None and
                 participant_count >= event.max_attendees
             )
-            image_path = event.image
-            if image_path and image_path.startswith("static/"):
-                image_path = image_path[len("static/"):]
+            image_path = _public_image_path(event.image)
+            image_variants = (
+                {name: _public_image_path(path) for name, path in event.image_variants.items()}
+                if event.image_variants else None
+            )
 
             event_data = {
                 "id": event.id,
@@ -207,6 +290,7 @@ class EventService:
                 "category": event.category,
                 "price": event.price,
                 "image": image_path,
+                "image_variants": image_variants,
                 "is_public": event.is_public,
                 "allow_comments": event.allow_comments,
                 "allow_sharing": event.allow_sharing,
@@ -228,8 +312,37 @@ class EventService:
             "pages": total_pages,
             "page": page,
             "per_page": per_page,
+            "next_cursor": next_cursor,
         }
 
+    async def reconcile_comment_counts(self) -> int:
+        """Répare la dérive éventuelle de events.comments_count ; retourne le nombre d'événements corrigés"""
+        result = await self.db.execute(text("""
+            UPDATE events AS e
+            SET comments_count = COALESCE(c.total, 0)
+            FROM events AS e2
+            LEFT JOIN (
+                SELECT event_id, count(*) AS total
+                FROM event_comments
+                GROUP BY event_id
+            ) AS c ON c.event_id = e2.id
+            WHERE e.id = e2.id
+              AND e.comments_count IS DISTINCT FROM COALESCE(c.total, 0)
+        """))
+        await self.db.commit()
+        if result.rowcount:
+            logger.warning(f"comments_count corrigé pour {result.rowcount} événements")
+        return result.rowcount
+
+    async def _estimate_event_count(self) -> int:
+        """Nombre approximatif d'événements lu dans les statistiques de pg_class (temps constant)"""
+        result = await self.db.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE relname = :table"),
+            {"table": Event.__tablename__}
+        )
+        estimate = result.scalar()
+        return max(int(estimate or 0), 0)
+
     async def _create_activity(self, event_id: int, user_id: str, activity_type: ActivityType, data: dict):
         json_data = json.dumps(data) if data is not None else None
         activity = EventActivity(
@@ -241,76 +354,45 @@ class EventService:
         self.db.add(activity)
         await self.db.flush()
 
-    async def get_comments(self, event_id: int) -> List[EventCommentResponse]:
-        logger.info(f"Start loading comments for event_id={event_id}")
-
-        # 1. Récupérer les commentaires parents (parent_id is None), avec auteur chargé
-        result = await self.db.execute(
-            select(EventComment)
+    async def get_comments(self, event_id: int, max_depth: Optional[int] = None) -> List[EventCommentResponse]:
+        """
+        Charge tout le fil de discussion d'un événement en une seule requête
+        (CTE récursive sur parent_id, auteurs en jointure), puis construit
+        l'arbre en mémoire en O(n). max_depth=0 ne garde que les commentaires racines.
+        """
+        # 1. CTE récursive : racines de l'événement puis réponses niveau par niveau
+        thread = (
+            select(EventComment.id, literal(0).label("depth"))
             .where(
                 EventComment.event_id == event_id,
                 EventComment.parent_id.is_(None)
             )
-            .order_by(EventComment.created_at.asc())
-            .options(selectinload(EventComment.author))
+            .cte("comment_thread", recursive=True)
         )
-        parents = result.scalars().all()
-        logger.info(f"Step 1: Found {len(parents)} parent comments")
-
-        if not parents:
-            logger.warning(f"No parent comments found for event_id={event_id}")
-            return []
-
-        parent_ids = [c.id for c in parents]
+        replies_step = (
+            select(EventComment.id, (thread.c.depth + 1).label("depth"))
+            .join(thread, EventComment.parent_id == thread.c.id)
+        )
+        if max_depth is not None:
+            replies_step = replies_step.where(thread.c.depth < max_depth)
+        thread = thread.union_all(replies_step)
 
-        # 2. Récupérer toutes les réponses associées, avec auteur aussi
         result = await self.db.execute(
             select(EventComment)
-            .where(EventComment.parent_id.in_(parent_ids))
-            .options(selectinload(EventComment.author))
-        )
-        replies = result.scalars().all()
-        logger.info(f"Step 2: Found {len(replies)} reply comments")
-
-        # 3. Construire un dictionnaire parent_id -> liste de réponses
-        replies_by_parent = {}
-        for reply in replies:
-            replies_by_parent.setdefault(reply.parent_id, []).append(reply)
-
-        # 4. Récupérer tous les user_id des auteurs (parents + replies)
-        user_ids = {comment.author_id for comment in parents + replies if comment.author_id is not None}
-        logger.info(f"Step 3: Extracted user_ids from comments: {user_ids}")
-
-        # 5. Charger en une seule requête les avatars depuis MongoDB
-        avatar_map = {}
-        cursor = profiles_collection.find(
-            {"user_id": {"$in": list(user_ids)}},
-            {"_id": 0, "user_id": 1, "avatar_url": 1}
+            .join(thread, EventComment.id == thread.c.id)
+            .options(joinedload(EventComment.author))
+            .order_by(EventComment.created_at.asc(), EventComment.id.asc())
         )
-        async for profile in cursor:
-            avatar_map[profile["user_id"]] = profile.get("avatar_url")
-
-        logger.info(f"Step 4: Loaded avatar map for users: {list(avatar_map.keys())}")
-
-        # 6. Vérification détaillée des parents et auteurs
-        logger.info("Step 5: Inspecting parent comments and their authors:")
-        for c in parents:
-            if c.author is None:
-                logger.error(f"Parent comment ID {c.id} has no author loaded! author_id={c.author_id}")
-            else:
-                logger.debug(f"Parent comment ID {c.id} author: id={c.author.id}, first_name='{c.author.first_name}', last_name='{c.author.last_name}'")
-
-        logger.info("Step 6: Inspecting reply comments and their authors:")
-        for r in replies:
-            if r.author is None:
-                logger.error(f"Reply comment ID {r.id} has no author loaded! author_id={r.author_id}")
-            else:
-                logger.debug(f"Reply comment ID {r.id} author: id={r.author.id}, first_name='{r.author.first_name}', last_name='{r.author.last_name}'")
+        comments = result.scalars().unique().all()
+        if not comments:
+            return []
 
-        logger.info(f"Step 7: Avatar map keys: {list(avatar_map.keys())}")
+        # 2. Avatars des auteurs en une requête Mongo ($in)
+        avatar_map = await get_avatar_map(c.author_id for c in comments)
 
-        # 7. Fonction récursive pour construire la hiérarchie, avec avatar_url (Mongo) et full_name (PostgreSQL)
-        def build_tree(comment: EventComment):
+        # 3. Un nœud par commentaire, puis rattachement au parent
+        nodes = {}
+        for comment in comments:
             author = comment.author
             avatar_url = None
             full_name = "Utilisateur supprimé"  # fallback si auteur supprimé
@@ -320,13 +402,7 @@ class EventService:
                 full_name = f"{first_name} {last_name}".strip() or "Anonyme"
                 avatar_url = avatar_map.get(author.id)
 
-            # Logs détaillés pour debug
-            logger.debug(f"Building comment id={comment.id}:")
-            logger.debug(f"  author_id={comment.author_id}")
-            logger.debug(f"  full_name='{full_name}'")
-            logger.debug(f"  avatar_url='{avatar_url}'")
-
-            return EventCommentResponse(
+            nodes[comment.id] = EventCommentResponse(
                 id=comment.id,
                 content=comment.content,
                 created_at=comment.created_at,
@@ -336,10 +412,27 @@ class EventService:
                 parent_id=comment.parent_id,
                 avatar_url=avatar_url,
                 full_name=full_name,
-                replies=[build_tree(child) for child in replies_by_parent.get(comment.id, [])]
+                replies=[]
             )
 
-        # 8. Retourner la liste complète avec hiérarchie
-        comments_tree = [build_tree(parent) for parent in parents]
-        logger.info(f"Loaded {len(comments_tree)} top-level comments for event_id={event_id}")
-        return comments_tree
+        roots = []
+        for comment in comments:
+            node = nodes[comment.id]
+            if comment.parent_id is None:
+                roots.append(node)
+            else:
+                nodes[comment.parent_id].replies.append(node)
+
+        logger.info(f"Loaded {len(comments)} comments ({len(roots)} top-level) for event_id={event_id}")
+        return roots
+
+
+async def run_comment_count_reconciler(session_factory, interval: float) -> None:
+    """Tâche de fond : répare périodiquement les compteurs de commentaires"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with session_factory() as session:
+                await EventService(session).reconcile_comment_counts()
+        except Exception as e:
+            logger.error(f"Erreur réconciliation comments_count: {e}")
@@ -1,16 +1,19 @@
 from fastapi import APIRouter, HTTPException, Query
-from typing import List
+from fastapi.responses import StreamingResponse
+from typing import List, Optional, Union
 from bson import ObjectId
-from app.users.models import UserProfile
-from app.db.mongo import client
-from pydantic import ValidationError
-import json
-import re
-import traceback
-
+from app.users.models import UserProfile, FriendSummary, FriendListResponse
+from app.db.mongo import profiles_collection
+from app.users.search import autocomplete_profiles, text_search_profiles
+from app.friends.services import (
+    all_friends, list_friends, list_friends_by_activity, stream_friends, InvalidCursorError
+)
+from app.users.presence import apply_presence
+from app.utils.serialization import FastJSONResponse, trusted_list
+import logging
+
+logger = logging.getLogger(__name__)
 router = APIRouter()
-db = client["Annivdb"]
-profiles_collection = db["profiles"]
 
 # ────────────────────────────────
 # Nettoyage d'un document MongoDB
@@ -37,41 +40,70 @@ def clean_doc(doc: dict) -> dict:
 # ────────────────────────────────
 # Obtenir la liste des amis d’un utilisateur
 # ────────────────────────────────
-@router.get("/{user_id}/friends", response_model=List[UserProfile])
-async def get_user_friends(user_id: int):
-    print(f"\n📥 Requête reçue pour user_id={user_id}")
-
-    user = await profiles_collection.find_one({"user_id": user_id})
+@router.get("/{user_id}/friends", response_model=Union[List[FriendSummary], FriendListResponse])
+async def get_user_friends(
+    user_id: int,
+    paginate: bool = Query(False, description="true : page {friends, next_cursor} au lieu du tableau complet"),
+    limit: int = Query(50, ge=1, le=200, description="Nombre d'amis par page (pagination)"),
+    cursor: Optional[str] = Query(None, description="Curseur renvoyé par la page précédente"),
+    format: str = Query("json", regex="^(json|ndjson)$", description="ndjson : liste complète en flux"),
+    sort: str = Query("recent", regex="^(recent|last_activity)$", description="recent : abonnement le plus récent d'abord ; last_activity : ami le plus récemment actif d'abord")
+):
+    user = await profiles_collection.find_one({"user_id": user_id}, {"_id": 1})
     if not user:
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
 
-    follow_ids = user.get("follow", [])
-    print(f"🧾 Liste des IDs suivis : {follow_ids}")
-
-    if not follow_ids:
-        return []
-
-    cursor = profiles_collection.find({"user_id": {"$in": follow_ids}})
-    friends = []
-    count = 0
-
-    async for doc in cursor:
-        count += 1
-        cleaned = clean_doc(doc)
-        try:
-            user_obj = UserProfile(**cleaned)
-            serialized = user_obj.model_dump()
-            print(f"\n👤 Ami {count} trouvé :\n{json.dumps(serialized, indent=2, ensure_ascii=False, default=str)}")
-            friends.append(user_obj)
-        except ValidationError as e:
-            print(f"❌ Erreur de validation Pydantic pour user_id={doc.get('user_id')}: {e}")
-            continue
-
-    print(f"\n📤 Total d'amis renvoyés : {len(friends)}\n")
-    return friends
+    if format == "ndjson":
+        return StreamingResponse(stream_friends(user_id), media_type="application/x-ndjson")
+
+    # Par défaut : tableau complet (contrat du client mobile) ; pagination sur demande
+    if not paginate and cursor is None:
+        return await all_friends(user_id, sort)
+
+    page = list_friends_by_activity if sort == "last_activity" else list_friends
+    try:
+        friends, next_cursor = await page(user_id, limit, cursor)
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Curseur invalide")
+
+    return {"friends": friends, "next_cursor": next_cursor}
+
+
 # ────────────────────────────────
 # Recherche stricte (commence par...)
 # ────────────────────────────────
+SEARCH_PROJECTION = {
+    "_id": 1,
+    "user_id": 1,
+    "email": 1,
+    "phone": 1,
+    "first_name": 1,
+    "last_name": 1,
+    "username": 1,
+    "avatar_url": 1,
+    "avatar_variants": 1,
+    "bio": 1,
+    "location": 1,
+    "online_status": 1,
+    "last_seen": 1,
+    "last_activity": 1,
+    "level": 1,
+    "points": 1,
+    "friends_count": 1,
+    "registered_at": 1
+}
+
+
+def _to_profiles(docs: List[dict]) -> FastJSONResponse:
+    """Profils construits sans revalidation (données lues en base) et encodés par orjson"""
+    for doc in docs:
+        doc.pop("search_keys", None)
+        doc.pop("score", None)
+        apply_presence(doc)
+        doc.pop("last_activity", None)
+    return FastJSONResponse(trusted_list(UserProfile, (clean_doc(doc) for doc in docs)))
+
+
 @router.get("/search", response_model=List[UserProfile])
 async def search_users(q: str = Query(..., min_length=1, description="Terme de recherche")):
     try:
@@ -79,82 +111,14 @@ async def search_users(q: str = Query(..., min_length=1, description="Terme de r
         if not q_clean:
             raise HTTPException(status_code=400, detail="Terme de recherche vide")
 
-        try:
-            escaped_q = re.escape(q_clean)
-            regex_pattern = {"$regex": f"^{escaped_q}", "$options": "i"}
-        except Exception as e:
-            print(f"❌ Erreur dans regex : {e}")
-            raise HTTPException(status_code=400, detail="Mot-clé invalide")
-
-        # Construction de la requête Mongo
-        filter_query = {
-            "$or": [
-                {"first_name": regex_pattern},
-                {"last_name": regex_pattern},
-                {"email": regex_pattern},
-                {"username": regex_pattern}
-            ]
-        }
-
-        if q_clean:
-            filter_query["$or"].append({"phone": regex_pattern})
-
-        if q_clean.isdigit():
-            try:
-                user_id_int = int(q_clean)
-                filter_query["$or"].append({"user_id": user_id_int})
-            except ValueError:
-                pass
-
-        print(f"🔍 Recherche avec pattern: {escaped_q}")
-        print(f"📝 Requête MongoDB: {filter_query}")
-
-        # Projection optionnelle pour améliorer les performances
-        projection = {
-            "_id": 1,
-            "user_id": 1,
-            "email": 1,
-            "phone": 1,
-            "first_name": 1,
-            "last_name": 1,
-            "username": 1,
-            "avatar_url": 1,
-            "bio": 1,
-            "location": 1,
-            "online_status": 1,
-            "level": 1,
-            "points": 1,
-            "friends_count": 1,
-            "registered_at": 1
-        }
-
-        cursor = profiles_collection.find(filter_query, projection).limit(50)
-
-        results = []
-        documents_count = 0
-
-        async for doc in cursor:
-            documents_count += 1
-            try:
-                cleaned = clean_doc(doc)
-                print(f"✅ {cleaned.get('first_name')} {cleaned.get('last_name')} (ID: {cleaned.get('user_id')})")
-                user = UserProfile(**cleaned)
-                results.append(user)
-            except ValidationError as ve:
-                print(f"❌ Erreur de validation : {ve}")
-                continue
-            except Exception as e:
-                print(f"❌ Erreur inattendue : {e}")
-                continue
-
-        print(f"🎯 Résultats : {len(results)} utilisateurs trouvés sur {documents_count} documents")
-        return results
+        # Préfixe sur les clés normalisées (index search_keys.*), trié par pertinence
+        docs = await autocomplete_profiles(q_clean, projection=SEARCH_PROJECTION, limit=50)
+        return _to_profiles(docs)
 
     except HTTPException:
         raise
     except Exception as e:
-        print(f"💥 Erreur dans search_users : {str(e)}")
-        traceback.print_exc()
+        logger.exception(f"💥 Erreur dans search_users : {e}")
         raise HTTPException(status_code=500, detail=f"Erreur interne : {str(e)}")
 
 # ────────────────────────────────
@@ -167,49 +131,12 @@ async def search_users_flexible(q: str = Query(..., min_length=1, description="T
         if not q_clean:
             raise HTTPException(status_code=400, detail="Terme de recherche vide")
 
-        escaped_q = re.escape(q_clean)
-        regex_pattern = {"$regex": escaped_q, "$options": "i"}
-
-        filter_query = {
-            "$or": [
-                {"first_name": regex_pattern},
-                {"last_name": regex_pattern},
-                {"email": regex_pattern},
-                {"username": regex_pattern},
-                {"phone": regex_pattern},
-            ]
-        }
-
-        if q_clean.isdigit():
-            filter_query["$or"].append({"user_id": int(q_clean)})
-
-        print(f"🔍 Recherche flexible avec pattern: {escaped_q}")
-        print(f"📝 Requête MongoDB: {filter_query}")
-
-        cursor = profiles_collection.find(filter_query).limit(50)
-        results = []
-        documents_count = 0
-
-        async for doc in cursor:
-            documents_count += 1
-            try:
-                cleaned_doc = clean_doc(doc)
-                print(f"✅ Document {documents_count}: {cleaned_doc.get('first_name')} {cleaned_doc.get('last_name')} (ID: {cleaned_doc.get('user_id')})")
-                user = UserProfile(**cleaned_doc)
-                results.append(user)
-            except ValidationError as ve:
-                print(f"❌ Erreur de validation pour document {documents_count}: {ve}")
-                continue
-            except Exception as e:
-                print(f"❌ Erreur inattendue pour document {documents_count}: {e}")
-                continue
-
-        print(f"🎯 Résultats: {len(results)} utilisateurs trouvés sur {documents_count} documents traités")
-        return results
+        # Index texte sur search_keys.text, trié par textScore
+        docs = await text_search_profiles(q_clean, limit=50)
+        return _to_profiles(docs)
 
     except HTTPException:
         raise
     except Exception as e:
-        print(f"💥 Erreur dans search_users_flexible: {str(e)}")
-        traceback.print_exc()
+        logger.exception(f"💥 Erreur dans search_users_flexible: {e}")
         raise HTTPException(status_code=500, detail=f"Erreur interne: {str(e)}")
@@ -0,0 +1,170 @@
+# app/friends/services.py - Liste d'amis (complète, paginée par curseur sur les arêtes, ou en flux NDJSON)
+import base64
+import json
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
+
+from bson import ObjectId
+
+from app.db.mongo import follows_collection, profiles_collection
+from app.users.follows import list_followers
+from app.users.presence import apply_presence
+
+# Projection minimale renvoyée pour chaque ami
+FRIEND_PROJECTION = {
+    "_id": 1,
+    "user_id": 1,
+    "first_name": 1,
+    "last_name": 1,
+    "username": 1,
+    "avatar_url": 1,
+    "online_status": 1,
+    "last_activity": 1,
+}
+
+STREAM_BATCH_SIZE = 500
+
+# Clé de tri des profils sans activité connue : toujours en fin de liste
+NO_ACTIVITY = datetime(1970, 1, 1)
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def _slim(doc: dict) -> dict:
+    doc["_id"] = str(doc["_id"])
+    apply_presence(doc)
+    doc.pop("search_keys", None)
+    return doc
+
+
+async def _profiles_in_order(user_ids: List[int]) -> List[dict]:
+    """Profils d'une page d'ids, dans l'ordre des ids (les profils supprimés sont ignorés)"""
+    docs = await profiles_collection.find({"user_id": {"$in": user_ids}}, FRIEND_PROJECTION).to_list(length=None)
+    by_id = {doc["user_id"]: doc for doc in docs}
+    return [_slim(by_id[uid]) for uid in user_ids if uid in by_id]
+
+
+async def list_friends(
+    user_id: int,
+    limit: int = 50,
+    cursor: Optional[str] = None
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Page d'amis (abonnés) du plus récent au plus ancien, + curseur de la page suivante.
+    La pagination se fait sur les arêtes (index followee_recent) : seuls les `limit`
+    profils de la page sont lus, quel que soit le nombre total d'abonnés. Un tri par
+    nom n'est pas proposé ici : le nom est dans profiles, il faudrait lire tout
+    l'ensemble des abonnés pour chaque page.
+    """
+    if cursor and not ObjectId.is_valid(cursor):
+        raise InvalidCursorError("Curseur invalide")
+
+    ids, next_cursor = await list_followers(user_id, limit, cursor)
+    if not ids:
+        return [], None
+    return await _profiles_in_order(ids), next_cursor
+
+
+def encode_activity_cursor(last_activity: datetime, user_id: int) -> str:
+    """Curseur opaque (last_activity, user_id) pour le tri par activité"""
+    raw = json.dumps({"a": last_activity.isoformat(), "u": user_id})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_activity_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(data["a"]), int(data["u"])
+    except Exception:
+        raise InvalidCursorError("Curseur invalide")
+
+
+async def list_friends_by_activity(
+    user_id: int,
+    limit: int = 50,
+    cursor: Optional[str] = None
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Page d'amis du plus récemment actif au moins actif, + curseur de la page suivante.
+    last_activity vit dans profiles : le tri ne peut pas venir d'un index des arêtes.
+    L'agrégation reste côté Mongo : arêtes via followee_recent, profils via l'index
+    user_id ($lookup), puis $sort + $limit en top-k (mémoire bornée par `limit`).
+    Le coût d'une page croît donc avec le nombre d'abonnés, sans transférer leurs ids.
+    """
+    pipeline = [
+        {"$match": {"followee_id": user_id}},
+        {"$lookup": {
+            "from": profiles_collection.name,
+            "localField": "follower_id",
+            "foreignField": "user_id",
+            "as": "profile",
+        }},
+        {"$unwind": "$profile"},
+        {"$replaceRoot": {"newRoot": "$profile"}},
+        {"$project": FRIEND_PROJECTION},
+        {"$addFields": {"_activity": {"$ifNull": ["$last_activity", NO_ACTIVITY]}}},
+    ]
+    if cursor:
+        activity, last_user_id = decode_activity_cursor(cursor)
+        pipeline.append({"$match": {"$or": [
+            {"_activity": {"$lt": activity}},
+            {"_activity": activity, "user_id": {"$lt": last_user_id}},
+        ]}})
+    pipeline += [
+        {"$sort": {"_activity": -1, "user_id": -1}},
+        {"$limit": limit + 1},
+    ]
+
+    docs = await follows_collection.aggregate(pipeline).to_list(length=limit + 1)
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_activity_cursor(docs[-1]["_activity"], docs[-1]["user_id"])
+    for doc in docs:
+        doc.pop("_activity", None)
+    return [_slim(doc) for doc in docs], next_cursor
+
+
+async def all_friends(user_id: int, sort: str = "recent") -> List[dict]:
+    """Liste complète des amis (réponse historique en tableau), lue par lots d'arêtes"""
+    friends: List[dict] = []
+    async for batch in _follower_batches(user_id):
+        friends.extend(await _profiles_in_order(batch))
+    if sort == "last_activity":
+        # La liste est déjà entière en mémoire : tri local, même ordre que la pagination
+        friends.sort(key=lambda f: (f.get("last_activity") or NO_ACTIVITY, f["user_id"]), reverse=True)
+    return friends
+
+
+async def _follower_batches(user_id: int) -> AsyncIterator[List[int]]:
+    edges = follows_collection.find(
+        {"followee_id": user_id}, {"_id": 0, "follower_id": 1}
+    ).batch_size(STREAM_BATCH_SIZE)
+
+    batch: List[int] = []
+    async for edge in edges:
+        batch.append(edge["follower_id"])
+        if len(batch) >= STREAM_BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def stream_friends(user_id: int) -> AsyncIterator[str]:
+    """
+    Génère la liste complète des amis en NDJSON, lot par lot :
+    la mémoire reste bornée par STREAM_BATCH_SIZE quelle que soit la taille de la liste.
+    """
+    async for batch in _follower_batches(user_id):
+        async for line in _profile_lines(batch):
+            yield line
+
+
+async def _profile_lines(user_ids: List[int]) -> AsyncIterator[str]:
+    cursor = profiles_collection.find({"user_id": {"$in": user_ids}}, FRIEND_PROJECTION)
+    async for doc in cursor:
+        yield json.dumps(_slim(doc), default=str, ensure_ascii=False) + "\n"
@@ -1,25 +1,48 @@
 import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 
-from app.users.api import mark_users_offline_if_inactive  # Import de la fonction à appeler périodiquement
+from app.utils.logger import setup_logging
+from app.utils.image_variants import shutdown_image_workers
+from app.utils.storage import storage
+from app.utils.static_delivery import CachedStaticFiles, precompress_static
+from app.utils.serialization import FastJSONResponse
+from app.utils.request_limits import BodySizeLimitMiddleware
+
+setup_logging()
+
 from app.auth.api import router as auth_router
 from app.users.api import router as users_router
 from app.friends.api import router as friends_router
 from app.events.api import router as event_router
+from app.stats.api import router as stats_router
+from app.events.services import run_comment_count_reconciler
+from app.db.session import AsyncSessionLocal
+from app.config import settings
+from app.users.search import backfill_search_keys
+from app.users.presence import presence, heartbeat_buffer
+from app.users.counters import profile_view_counter
+from app.users.follows import run_follow_migration
+from app.db.indexes import bootstrap_indexes
+from app.utils.blob_store import run_garbage_collector
+from app.auth.password import password_hasher
 
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse)
 
 upload_dir = Path("static/upload")
 upload_dir.mkdir(parents=True, exist_ok=True)
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Uploads à empreinte servis avec Cache-Control immutable, variantes .br/.gz, Range
+app.mount("/static", CachedStaticFiles(directory="static"), name="static")
 
 app.include_router(auth_router, prefix="/auth")
 app.include_router(users_router)
 app.include_router(friends_router, prefix="/friends")
 app.include_router(event_router)
+app.include_router(stats_router)
+
+# Corps trop gros refusés avant que Starlette ne les lise en entier
+app.add_middleware(BodySizeLimitMiddleware, max_body_size=settings.MAX_REQUEST_BODY_SIZE)
 
 app.add_middleware(
     CORSMiddleware,
@@ -33,13 +56,31 @@ app.add_middleware(
 async def root():
     return {"message": "Bienvenue sur mon API FastAPI déployée sur Render !"}
 
-# Fonction asynchrone qui tourne en boucle pour checker l'inactivité
-async def start_offline_checker():
-    while True:
-        await mark_users_offline_if_inactive()
-        await asyncio.sleep(60)  # pause 60 secondes
-
 # Lancement de la tâche au démarrage de l'app
 @app.on_event("startup")
 async def startup_event():
-    asyncio.create_task(start_offline_checker())
+    # Expiration de la présence en mémoire (persistance de last_seen par lots)
+    asyncio.create_task(presence.run_sweeper())
+    asyncio.create_task(heartbeat_buffer.run())
+    asyncio.create_task(profile_view_counter.run())
+    asyncio.create_task(bootstrap_indexes())
+    asyncio.create_task(backfill_search_keys())
+    asyncio.create_task(run_follow_migration())
+    asyncio.create_task(run_comment_count_reconciler(
+        AsyncSessionLocal, settings.COMMENT_COUNT_RECONCILE_SECONDS
+    ))
+    asyncio.create_task(run_garbage_collector(
+        settings.BLOB_GC_INTERVAL_SECONDS, settings.BLOB_GC_GRACE_SECONDS
+    ))
+    asyncio.create_task(precompress_static("static"))
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Ne pas perdre les heartbeats et compteurs encore en mémoire
+    await heartbeat_buffer.close()
+    # Après le vidage du tampon : last_seen durable et online_status remis à False
+    await presence.close()
+    await profile_view_counter.close()
+    shutdown_image_workers()
+    storage.shutdown()
+    password_hasher.shutdown()
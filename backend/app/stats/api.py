@@ -0,0 +1,52 @@
+from fastapi import APIRouter, Depends, Query
+
+from app.auth.permissions import require_role
+from app.db.instrumentation import query_stats
+from app.db.pool import pool_metrics
+from app.db.mongo_metrics import command_latency
+from app.db.session import engine
+from app.users.follows import reconcile_follow_counters
+from app.utils.storage import storage
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+
+@router.get("/queries")
+async def slowest_queries(
+    limit: int = Query(20, ge=1, le=200, description="Nombre d'empreintes"),
+    order_by: str = Query("max_ms", regex="^(max_ms|avg_ms|total_ms|count)$"),
+    user=Depends(require_role("admin"))
+):
+    """Top-N des empreintes de requêtes SQL les plus lentes"""
+    return {"queries": query_stats.top(limit, order_by)}
+
+
+@router.delete("/queries")
+async def reset_query_stats(user=Depends(require_role("admin"))):
+    """Remet à zéro les agrégats de requêtes"""
+    query_stats.reset()
+    return {"msg": "Statistiques réinitialisées"}
+
+
+@router.get("/pool")
+async def pool_status(user=Depends(require_role("admin"))):
+    """État et métriques du pool de connexions Postgres"""
+    return pool_metrics.snapshot(engine.pool)
+
+
+@router.get("/mongo")
+async def mongo_command_latency(user=Depends(require_role("admin"))):
+    """Latence des commandes MongoDB par collection et par commande"""
+    return {"commands": command_latency.snapshot()}
+
+
+@router.get("/storage")
+async def storage_latency(user=Depends(require_role("admin"))):
+    """Latence des opérations disque par type et occupation du pool de stockage"""
+    return storage.metrics.snapshot()
+
+
+@router.post("/follows/{user_id}/reconcile")
+async def reconcile_follows(user_id: int, user=Depends(require_role("admin"))):
+    """Recalcule les compteurs followers / following d'un utilisateur depuis le graphe"""
+    return await reconcile_follow_counters(user_id)
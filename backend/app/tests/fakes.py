@@ -0,0 +1,142 @@
+# app/tests/fakes.py - Collection MongoDB en mémoire (sous-ensemble des filtres et opérateurs utilisés par l'app)
+import copy
+import itertools
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+
+def _matches_value(value: Any, condition: Any) -> bool:
+    if isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition):
+        for op, operand in condition.items():
+            if op == "$exists":
+                if (value is not _MISSING) != operand:
+                    return False
+            elif value is _MISSING:
+                return False
+            elif op == "$in" and value not in operand:
+                return False
+            elif op == "$lt" and not value < operand:
+                return False
+            elif op == "$lte" and not value <= operand:
+                return False
+            elif op == "$gt" and not value > operand:
+                return False
+        return True
+    return value == condition
+
+
+_MISSING = object()
+
+
+def matches(doc: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(matches(doc, branch) for branch in condition):
+                return False
+        elif not _matches_value(doc.get(key, _MISSING), condition):
+            return False
+    return True
+
+
+def apply_update(doc: Dict[str, Any], update: Dict[str, Any], inserting: bool = False) -> None:
+    for field, value in update.get("$set", {}).items():
+        doc[field] = value
+    for field, delta in update.get("$inc", {}).items():
+        doc[field] = doc.get(field, 0) + delta
+    if inserting:
+        for field, value in update.get("$setOnInsert", {}).items():
+            doc[field] = value
+
+
+class FakeCollection:
+    """
+    Collection en mémoire : égalité, $exists/$in/$lt/$lte/$gt, $or ; mises à jour
+    $set/$inc/$setOnInsert. `unique` liste les champs d'un index unique simulé.
+    `fail_writes` fait échouer les prochains bulk_write (ConnectionError).
+    """
+
+    def __init__(self, name: str = "fake", unique: Optional[List[str]] = None):
+        self.name = name
+        self.unique = unique
+        self.docs: List[Dict[str, Any]] = []
+        self.fail_writes = 0
+        self.bulk_calls: List[list] = []
+        self._ids = itertools.count(1)
+
+    def _find(self, query):
+        return [doc for doc in self.docs if matches(doc, query)]
+
+    def _check_unique(self, doc):
+        if not self.unique:
+            return
+        key = tuple(doc.get(field) for field in self.unique)
+        if any(tuple(other.get(field) for field in self.unique) == key for other in self.docs):
+            raise DuplicateKeyError("E11000 duplicate key")
+
+    async def insert_one(self, doc):
+        doc = copy.deepcopy(doc)
+        doc.setdefault("_id", next(self._ids))
+        if any(other["_id"] == doc["_id"] for other in self.docs):
+            raise DuplicateKeyError("E11000 duplicate key _id")
+        self._check_unique(doc)
+        self.docs.append(doc)
+        return SimpleNamespace(inserted_id=doc["_id"])
+
+    async def find_one(self, query, projection=None):
+        found = self._find(query)
+        return copy.deepcopy(found[0]) if found else None
+
+    async def update_one(self, query, update, upsert=False):
+        found = self._find(query)
+        if found:
+            apply_update(found[0], update)
+        return SimpleNamespace(matched_count=len(found[:1]), modified_count=len(found[:1]))
+
+    async def find_one_and_update(self, query, update, upsert=False, return_document=False):
+        found = self._find(query)
+        if found:
+            before = copy.deepcopy(found[0])
+            apply_update(found[0], update)
+            return copy.deepcopy(found[0]) if return_document else before
+        if not upsert:
+            return None
+        doc = {key: value for key, value in query.items() if not key.startswith("$") and not isinstance(value, dict)}
+        apply_update(doc, update, inserting=True)
+        await self.insert_one(doc)
+        return copy.deepcopy(doc) if return_document else None
+
+    async def delete_one(self, query):
+        found = self._find(query)
+        if found:
+            self.docs.remove(found[0])
+        return SimpleNamespace(deleted_count=len(found[:1]))
+
+    async def bulk_write(self, operations, ordered=True):
+        self.bulk_calls.append(list(operations))
+        if self.fail_writes:
+            self.fail_writes -= 1
+            raise ConnectionError("connexion perdue")
+        for operation in operations:
+            doc = operation._doc
+            found = self._find(operation._filter)
+            if found:
+                apply_update(found[0], doc)
+            elif getattr(operation, "_upsert", False):
+                new_doc = dict(operation._filter)
+                apply_update(new_doc, doc, inserting=True)
+                await self.insert_one(new_doc)
+        return SimpleNamespace(bulk_api_result={})
+
+    def get(self, **query) -> Optional[Dict[str, Any]]:
+        found = self._find(query)
+        return found[0] if found else None
+
+
+def bulk_write_error(*failed_indexes: int) -> BulkWriteError:
+    """BulkWriteError dont seules les opérations `failed_indexes` ont échoué"""
+    return BulkWriteError({
+        "writeErrors": [{"index": index, "code": 11000, "errmsg": "échec"} for index in failed_indexes],
+        "nInserted": 0,
+    })
@@ -0,0 +1,104 @@
+import asyncio
+import hashlib
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from app.tests.fakes import FakeCollection
+from app.utils import blob_store, uploads
+from app.utils.storage import StorageService
+
+CONTENT = b"\x89PNG fake image"
+DIGEST = hashlib.sha256(CONTENT).hexdigest()
+
+
+@pytest.fixture
+def blobs(monkeypatch, tmp_path):
+    # BLOB_ROOT est relatif : tout se passe sous tmp_path
+    monkeypatch.chdir(tmp_path)
+    collection = FakeCollection("blobs")
+    storage = StorageService(max_workers=2, max_concurrency=4)
+    monkeypatch.setattr(blob_store, "blobs_collection", collection)
+    monkeypatch.setattr(blob_store, "storage", storage)
+    monkeypatch.setattr(uploads, "storage", storage)
+    yield collection
+    storage.shutdown()
+
+
+def backdate(collection, digest, seconds=3600):
+    collection.get(_id=digest)["updated_at"] = datetime.now(timezone.utc) - timedelta(seconds=seconds)
+
+
+def test_identical_content_is_stored_once(blobs):
+    async def scenario():
+        first = await blob_store.store_bytes(CONTENT, "png")
+        second = await blob_store.store_bytes(CONTENT, "PNG")
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first.created is True
+    assert second.created is False
+    assert first.path == second.path == blob_store.blob_path(DIGEST, "png")
+    assert first.path.read_bytes() == CONTENT
+    assert blobs.get(_id=DIGEST)["refs"] == 2
+    assert list(blob_store.BLOB_TMP_DIR.iterdir()) == []
+
+
+def test_digest_from_url_ignores_variants_and_foreign_paths():
+    path = blob_store.blob_path(DIGEST, "png").as_posix()
+    assert blob_store.digest_from_url(f"/{path}") == DIGEST
+    assert blob_store.digest_from_url(path) == DIGEST
+    assert blob_store.digest_from_url(path.replace(".png", "_thumb.webp")) is None
+    assert blob_store.digest_from_url("/static/upload/avatar.png") is None
+    assert blob_store.digest_from_url(None) is None
+
+
+def test_garbage_collection_keeps_referenced_blobs(blobs):
+    async def scenario():
+        blob = await blob_store.store_bytes(CONTENT, "png")
+        await blob_store.store_bytes(CONTENT, "png")
+        await blob_store.release(blob.url)
+        backdate(blobs, DIGEST)
+        return blob, await blob_store.collect_garbage(grace_seconds=600)
+
+    blob, removed = asyncio.run(scenario())
+    assert removed == 0
+    assert blobs.get(_id=DIGEST)["refs"] == 1
+    assert blob.path.exists()
+
+
+def test_garbage_collection_removes_unreferenced_blob_and_variants(blobs):
+    async def scenario():
+        blob = await blob_store.store_bytes(CONTENT, "png")
+        variant = blob.path.with_name(f"{DIGEST}_thumb.webp")
+        variant.write_bytes(b"thumb")
+        await blob_store.release(blob.url)
+        # Un release de trop ne fait pas passer le compteur sous zéro
+        await blob_store.release(blob.url)
+        assert blobs.get(_id=DIGEST)["refs"] == 0
+
+        # Délai de grâce pas encore écoulé : rien n'est supprimé
+        assert await blob_store.collect_garbage(grace_seconds=600) == 0
+        backdate(blobs, DIGEST)
+        assert await blob_store.collect_garbage(grace_seconds=600) == 1
+        return blob, variant
+
+    blob, variant = asyncio.run(scenario())
+    assert not blob.path.exists()
+    assert not variant.exists()
+    assert blobs.docs == []
+
+
+def test_blob_is_recreated_after_collection(blobs):
+    async def scenario():
+        blob = await blob_store.store_bytes(CONTENT, "png")
+        await blob_store.release(blob.url)
+        backdate(blobs, DIGEST)
+        await blob_store.collect_garbage(grace_seconds=600)
+        return await blob_store.store_bytes(CONTENT, "png")
+
+    blob = asyncio.run(scenario())
+    assert blob.created is True
+    assert Path(blob.path).read_bytes() == CONTENT
+    assert blobs.get(_id=DIGEST)["refs"] == 1
@@ -0,0 +1,87 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+from app.events import services
+from app.events.services import EventService
+
+START = datetime(2026, 5, 17, 18, 0)
+
+
+class FakeSession:
+    """Session factice : renvoie les commentaires donnés et garde la requête exécutée"""
+
+    def __init__(self, comments):
+        self.comments = comments
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        comments = self.comments
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(unique=lambda: SimpleNamespace(all=lambda: comments)))
+
+
+def comment(comment_id, parent_id=None, author=None, minutes=0):
+    created_at = START + timedelta(minutes=minutes)
+    return SimpleNamespace(
+        id=comment_id,
+        content=f"commentaire {comment_id}",
+        created_at=created_at,
+        updated_at=created_at,
+        event_id=1,
+        author_id=author.id if author else 404,
+        author=author,
+        parent_id=parent_id,
+    )
+
+
+def run_get_comments(monkeypatch, comments, max_depth=None):
+    async def avatar_map(author_ids):
+        return {author_id: f"/avatars/{author_id}.png" for author_id in set(author_ids)}
+
+    monkeypatch.setattr(services, "get_avatar_map", avatar_map)
+    session = FakeSession(comments)
+    roots = asyncio.run(EventService(session).get_comments(1, max_depth=max_depth))
+    return roots, session
+
+
+def test_comments_are_nested_under_their_parents(monkeypatch):
+    alice = SimpleNamespace(id=1, first_name="Alice", last_name="Martin")
+    bob = SimpleNamespace(id=2, first_name="Bob", last_name=None)
+    # Ordre de la requête (created_at, id) : un parent précède toujours ses réponses
+    comments = [
+        comment(10, author=alice, minutes=0),
+        comment(11, author=bob, minutes=1),
+        comment(12, parent_id=10, author=bob, minutes=2),
+        comment(13, parent_id=12, author=alice, minutes=3),
+        comment(14, parent_id=10, author=None, minutes=4),
+    ]
+
+    roots, session = run_get_comments(monkeypatch, comments)
+
+    assert len(session.statements) == 1
+    assert [root.id for root in roots] == [10, 11]
+    first = roots[0]
+    assert first.full_name == "Alice Martin"
+    assert first.avatar_url == "/avatars/1.png"
+    assert [reply.id for reply in first.replies] == [12, 14]
+    assert [reply.id for reply in first.replies[0].replies] == [13]
+    assert first.replies[0].full_name == "Bob"
+    assert first.replies[1].full_name == "Utilisateur supprimé"
+    assert first.replies[1].avatar_url is None
+    assert roots[1].replies == []
+
+
+def test_no_comments(monkeypatch):
+    roots, _ = run_get_comments(monkeypatch, [])
+    assert roots == []
+
+
+def test_thread_is_loaded_with_a_recursive_cte(monkeypatch):
+    _, session = run_get_comments(monkeypatch, [], max_depth=1)
+    sql = str(session.statements[0].compile(dialect=postgresql.dialect()))
+    assert sql.startswith("WITH RECURSIVE comment_thread")
+    assert "UNION ALL" in sql
+    assert "comment_thread.depth <" in sql
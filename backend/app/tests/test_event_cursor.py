@@ -0,0 +1,29 @@
+import base64
+from datetime import datetime, timezone
+
+import pytest
+
+from app.events.services import InvalidCursorError, decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    date = datetime(2026, 5, 17, 18, 30, tzinfo=timezone.utc)
+    cursor = encode_cursor(date, 42)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (date, 42)
+
+
+def test_cursor_keeps_naive_dates_naive():
+    date = datetime(2026, 5, 17, 18, 30, 5, 123456)
+    assert decode_cursor(encode_cursor(date, 7)) == (date, 7)
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "not a cursor",
+    base64.urlsafe_b64encode(b'{"d": "2026-05-17"}').decode(),
+    base64.urlsafe_b64encode(b'{"d": "hier", "i": 1}').decode(),
+])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor)
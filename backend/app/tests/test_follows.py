@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from app.tests.fakes import FakeCollection
+from app.users import follows
+
+
+@pytest.fixture
+def collections(monkeypatch):
+    edges = FakeCollection("follows", unique=["follower_id", "followee_id"])
+    profiles = FakeCollection("profiles")
+    monkeypatch.setattr(follows, "follows_collection", edges)
+    monkeypatch.setattr(follows, "profiles_collection", profiles)
+
+    async def seed():
+        for user_id in (1, 2, 3):
+            await profiles.insert_one({"user_id": user_id, "followers": 0, "following": 0})
+
+    asyncio.run(seed())
+    return edges, profiles
+
+
+def counters(profiles, user_id):
+    profile = profiles.get(user_id=user_id)
+    return profile["followers"], profile["following"]
+
+
+def test_follow_is_idempotent(collections):
+    edges, profiles = collections
+
+    async def scenario():
+        assert await follows.follow(1, 2) is True
+        assert await follows.follow(1, 2) is False
+        assert await follows.is_following(1, 2) is True
+        assert await follows.is_following(2, 1) is False
+
+    asyncio.run(scenario())
+    assert len(edges.docs) == 1
+    assert counters(profiles, 1) == (0, 1)
+    assert counters(profiles, 2) == (1, 0)
+
+
+def test_unfollow_only_decrements_existing_edges(collections):
+    edges, profiles = collections
+
+    async def scenario():
+        await follows.follow(1, 2)
+        assert await follows.unfollow(1, 2) is True
+        assert await follows.unfollow(1, 2) is False
+
+    asyncio.run(scenario())
+    assert edges.docs == []
+    assert counters(profiles, 1) == (0, 0)
+    assert counters(profiles, 2) == (0, 0)
+
+
+def test_reconcile_recomputes_counters_from_edges(collections):
+    edges, profiles = collections
+
+    async def count_documents(query):
+        return len(edges._find(query))
+
+    edges.count_documents = count_documents
+
+    async def scenario():
+        await follows.follow(1, 3)
+        await follows.follow(2, 3)
+        await follows.follow(3, 1)
+        # Dérive simulée (écriture perdue, ancien code...)
+        await profiles.update_one({"user_id": 3}, {"$set": {"followers": 7, "following": 0}})
+        return await follows.reconcile_follow_counters(3)
+
+    assert asyncio.run(scenario()) == {"followers": 2, "following": 1}
+    assert counters(profiles, 3) == (2, 1)
@@ -0,0 +1,42 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.friends import services
+from app.friends.services import InvalidCursorError, decode_activity_cursor, encode_activity_cursor
+
+
+def test_activity_cursor_round_trip():
+    last_activity = datetime(2026, 5, 17, 18, 30, 5, 123000)
+    assert decode_activity_cursor(encode_activity_cursor(last_activity, 12)) == (last_activity, 12)
+
+
+def test_invalid_activity_cursor_is_rejected():
+    with pytest.raises(InvalidCursorError):
+        decode_activity_cursor("pas-un-curseur")
+
+
+def test_all_friends_sorted_by_last_activity(monkeypatch):
+    profiles = {
+        1: {"user_id": 1, "last_activity": datetime(2026, 1, 1)},
+        2: {"user_id": 2},
+        3: {"user_id": 3, "last_activity": datetime(2026, 3, 1)},
+        4: {"user_id": 4, "last_activity": datetime(2026, 3, 1)},
+    }
+
+    async def follower_batches(user_id):
+        yield [1, 2]
+        yield [3, 4]
+
+    async def profiles_in_order(user_ids):
+        return [profiles[uid] for uid in user_ids]
+
+    monkeypatch.setattr(services, "_follower_batches", follower_batches)
+    monkeypatch.setattr(services, "_profiles_in_order", profiles_in_order)
+
+    recent = asyncio.run(services.all_friends(99))
+    by_activity = asyncio.run(services.all_friends(99, "last_activity"))
+    assert [f["user_id"] for f in recent] == [1, 2, 3, 4]
+    # Même ordre que la pagination : activité décroissante, puis user_id décroissant, sans activité en dernier
+    assert [f["user_id"] for f in by_activity] == [4, 3, 1, 2]
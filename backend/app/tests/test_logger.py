@@ -0,0 +1,32 @@
+import logging
+
+from app.utils.logger import RedactingFilter, redact
+
+
+def make_record(msg, args=()):
+    return logging.LogRecord("app.test", logging.INFO, __file__, 1, msg, args, None)
+
+
+def test_redact_masks_secrets():
+    assert redact("Authorization: Bearer abc.def-123") == "Authorization: Bearer [REDACTED]"
+    assert redact("jwt eyJhbGciOi.eyJzdWIiOjF9.c2lnbmF0dXJl") == "jwt [REDACTED_JWT]"
+    assert redact("new_password=hunter2 access_token: xyz") == "new_password=[REDACTED] access_token: [REDACTED]"
+    assert redact('{"reset_code": "123456"}') == '{"reset_code": "[REDACTED]"}'
+
+
+def test_redact_keeps_diagnostic_codes():
+    message = "status_code=404 error code: E42"
+    assert redact(message) == message
+
+
+def test_filter_redacts_formatted_message():
+    record = make_record("login %s token=%s", ("alice", "s3cr3t"))
+    assert RedactingFilter().filter(record) is True
+    assert record.getMessage() == "login alice token=[REDACTED]"
+    assert record.args is None
+
+
+def test_filter_keeps_record_with_mismatched_args():
+    record = make_record("secret=%s and %d", ("abc",))
+    assert RedactingFilter().filter(record) is True
+    assert record.getMessage() == "secret=[REDACTED] and %d"
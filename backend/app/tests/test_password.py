@@ -0,0 +1,49 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.auth import password
+from app.auth.password import PasswordHasher, PasswordHasherBusyError
+
+
+class BlockingContext:
+    """pwd_context factice : hash() bloque jusqu'à release"""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def hash(self, plain):
+        self.release.wait(timeout=5)
+        return f"hashed:{plain}"
+
+
+def test_hasher_rejects_beyond_max_queue(monkeypatch):
+    context = BlockingContext()
+    monkeypatch.setattr(password, "pwd_context", context)
+    hasher = PasswordHasher(workers=1, max_queue=1)
+
+    async def scenario():
+        running = asyncio.create_task(hasher.hash("a"))
+        await asyncio.sleep(0.05)
+        queued = asyncio.create_task(hasher.hash("b"))
+        await asyncio.sleep(0.05)
+        assert hasher.stats()["queue_depth"] == 1
+
+        with pytest.raises(PasswordHasherBusyError):
+            await hasher.hash("c")
+
+        context.release.set()
+        return await asyncio.gather(running, queued)
+
+    try:
+        assert asyncio.run(scenario()) == ["hashed:a", "hashed:b"]
+    finally:
+        context.release.set()
+        hasher.shutdown()
+
+    stats = hasher.stats()
+    assert stats["rejected"] == 1
+    assert stats["queue_depth"] == 0
+    assert stats["in_flight"] == 0
+    assert stats["operations"]["hash"]["count"] == 2
@@ -0,0 +1,141 @@
+import asyncio
+
+from app.tests.fakes import FakeCollection, bulk_write_error
+from app.utils.write_buffer import CoalescingCounterBuffer, CoalescingWriteBuffer
+
+
+def make_buffer(collection, buffer_class=CoalescingWriteBuffer, **overrides):
+    options = {"flush_interval": 60, "max_entries": 100, "max_pending": 1000}
+    options.update(overrides)
+    return buffer_class(collection, "user_id", name="test", **options)
+
+
+def test_add_keeps_last_value_per_field():
+    async def scenario():
+        collection = FakeCollection()
+        await collection.insert_one({"user_id": 1})
+        buffer = make_buffer(collection)
+        await buffer.add(1, {"last_seen": 1, "online_status": True})
+        await buffer.add(1, {"last_seen": 2})
+
+        assert buffer.get(1) == {"last_seen": 2, "online_status": True}
+        assert await buffer.flush() == 1
+        assert len(buffer) == 0
+        assert collection.get(user_id=1) == {"_id": 1, "user_id": 1, "last_seen": 2, "online_status": True}
+
+    asyncio.run(scenario())
+
+
+def test_failed_flush_is_requeued_under_newer_writes():
+    async def scenario():
+        collection = FakeCollection()
+        await collection.insert_one({"user_id": 1})
+        buffer = make_buffer(collection)
+        await buffer.add(1, {"last_seen": 1, "online_status": True})
+        await buffer.add(2, {"last_seen": 1})
+
+        collection.fail_writes = 1
+        await buffer.flush()
+        assert buffer.get(1) == {"last_seen": 1, "online_status": True}
+        assert len(buffer) == 2
+
+        # Écriture arrivée après l'échec : elle l'emporte sur le lot remis en attente
+        await buffer.add(1, {"last_seen": 5})
+        await buffer.flush()
+        assert len(buffer) == 0
+        assert collection.get(user_id=1)["last_seen"] == 5
+        assert collection.get(user_id=1)["online_status"] is True
+
+    asyncio.run(scenario())
+
+
+def test_bulk_write_error_requeues_only_failed_operations():
+    async def scenario():
+        collection = FakeCollection()
+        buffer = make_buffer(collection)
+        await buffer.add(1, {"last_seen": 1})
+        await buffer.add(2, {"last_seen": 2})
+
+        async def partial_failure(operations, ordered=True):
+            raise bulk_write_error(1)
+
+        collection.bulk_write = partial_failure
+        await buffer.flush()
+        assert buffer.get(1) == {}
+        assert buffer.get(2) == {"last_seen": 2}
+
+    asyncio.run(scenario())
+
+
+def test_batch_stays_readable_while_in_flight():
+    async def scenario():
+        collection = FakeCollection()
+        buffer = make_buffer(collection)
+        seen_during_write = {}
+
+        async def slow_write(operations, ordered=True):
+            await buffer.add(1, {"online_status": False})
+            seen_during_write.update(buffer.get(1))
+
+        collection.bulk_write = slow_write
+        await buffer.add(1, {"last_seen": 1, "online_status": True})
+        await buffer.flush()
+
+        assert seen_during_write == {"last_seen": 1, "online_status": False}
+        assert buffer.get(1) == {"online_status": False}
+
+    asyncio.run(scenario())
+
+
+def test_counter_deltas_are_summed_and_written_as_inc():
+    async def scenario():
+        collection = FakeCollection()
+        await collection.insert_one({"user_id": 1, "views": 10})
+        counter = make_buffer(collection, CoalescingCounterBuffer)
+        await counter.increment(1, "views")
+        await counter.increment(1, "views", 2)
+
+        assert counter.pending(1, "views") == 3
+        await counter.flush()
+        assert counter.pending(1, "views") == 0
+        assert collection.get(user_id=1)["views"] == 13
+
+    asyncio.run(scenario())
+
+
+def test_failed_counter_flush_adds_deltas_back():
+    async def scenario():
+        collection = FakeCollection()
+        await collection.insert_one({"user_id": 1, "views": 0})
+        counter = make_buffer(collection, CoalescingCounterBuffer)
+        await counter.increment(1, "views", 3)
+
+        collection.fail_writes = 1
+        await counter.flush()
+        await counter.increment(1, "views", 2)
+        assert counter.pending(1, "views") == 5
+
+        await counter.flush()
+        assert collection.get(user_id=1)["views"] == 5
+
+    asyncio.run(scenario())
+
+
+def test_counter_pending_includes_in_flight_deltas():
+    async def scenario():
+        collection = FakeCollection()
+        counter = make_buffer(collection, CoalescingCounterBuffer)
+        seen_during_write = []
+
+        async def slow_write(operations, ordered=True):
+            await counter.increment(1, "views")
+            seen_during_write.append(counter.pending(1, "views"))
+
+        collection.bulk_write = slow_write
+        await counter.increment(1, "views", 4)
+        await counter.flush()
+
+        assert seen_during_write == [5]
+        assert counter.pending(1, "views") == 1
+
+    asyncio.run(scenario())
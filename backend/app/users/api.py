@@ -1,27 +1,31 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Depends, Security, status, Request
+from fastapi import APIRouter, HTTPException, UploadFile, File, Depends, Security, status, Request, Query
 from fastapi.responses import JSONResponse
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from pathlib import Path
-import aiofiles
+from typing import Optional
 import logging
 import urllib.parse
-import uuid  # ← AJOUT DE L'IMPORT MANQUANT
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 from bson import ObjectId
 
-from app.users import services
+from app.users import services, follows
 from app.users.models import UserProfile, UserProfileUpdate
 from app.auth.dependencies import get_current_user  
 from app.users.services import format_profile_for_frontend
 from fastapi.security import HTTPBearer
 from fastapi import Security, Header
 from app.db.mongo import profiles_collection
+from app.users.presence import presence, heartbeat_buffer, effective_online
+from app.users.counters import profile_view_counter
+from app.utils.serialization import FastJSONResponse
+from app.utils.uploads import UploadTooLargeError
+from app.utils.image_variants import ensure_variants
+from app.utils import blob_store
+from app.utils.storage import storage
 
 
 security = HTTPBearer()
 
-# Configuration du logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/users", tags=["users"])
@@ -56,23 +60,32 @@ def validate_image_file(file: UploadFile) -> None:
 
 
 async def cleanup_old_image(identifier: str, image_type: str) -> None:
-    """Supprime l'ancienne image si elle existe"""
+    """
+    Libère l'ancienne image : une référence en moins pour un blob (supprimé par
+    la purge quand plus rien ne le référence), suppression directe pour les
+    anciens fichiers nommés par upload.
+    """
     try:
         profile = await services.get_profile_by_identifier(identifier)
         if not profile:
             return
         
-        old_url = None
-        if image_type == "avatar" and hasattr(profile, 'avatar_url'):
-            old_url = profile.avatar_url
-        elif image_type == "cover" and hasattr(profile, 'coverPhoto'):
-            old_url = profile.coverPhoto
-        
-        if old_url and _is_local_upload(old_url):
-            filepath = _get_file_path_from_url(old_url)
-            if filepath and filepath.exists():
-                filepath.unlink()
-                logger.info(f"Ancienne image supprimée: {filepath}")
+        old_urls = []
+        if image_type == "avatar":
+            old_urls = [profile.avatar_url, *(profile.avatar_variants or {}).values()]
+        elif image_type == "cover":
+            old_urls = [profile.coverPhoto, *(profile.cover_variants or {}).values()]
+
+        for old_url in old_urls:
+            if old_url and old_url.startswith(blob_store.BLOB_URL_PREFIX):
+                # Les déclinaisons suivent le cycle de vie du blob : seule l'image porte une référence
+                await blob_store.release(old_url)
+                continue
+            if old_url and _is_local_upload(old_url):
+                filepath = _get_file_path_from_url(old_url)
+                if filepath and await storage.exists(filepath):
+                    await storage.unlink(filepath)
+                    logger.info(f"Ancienne image supprimée: {filepath}")
     except Exception as e:
         logger.warning(f"Erreur lors de la suppression de l'ancienne image: {e}")
 
@@ -96,10 +109,9 @@ def _get_file_path_from_url(url: str) -> Path | None:
     return None
 
 
-def _create_safe_filename(identifier: str, prefix: str, extension: str) -> str:
-    """Crée un nom de fichier sécurisé"""
-    safe_id = identifier.replace('@', '_').replace('.', '_').replace('+', '_')
-    return f"{prefix}_{safe_id}_{uuid.uuid4().hex[:8]}.{extension}"
+def _variant_urls(variants: dict) -> dict:
+    """Chemins des déclinaisons (static/upload/...) -> URLs publiques"""
+    return {name: f"/{path}" for name, path in variants.items()}
 
 
 # 📋 GET /users/ - Lister les profils
@@ -108,7 +120,7 @@ async def list_profiles(skip: int = 0, limit: int = 100):
     """Lister les profils utilisateurs"""
     try:
         profiles = await services.get_user_profiles(skip=skip, limit=limit)
-        return {"profiles": profiles, "skip": skip, "limit": limit}
+        return FastJSONResponse({"profiles": profiles, "skip": skip, "limit": limit})
     except Exception as e:
         logger.error(f"Erreur liste profils: {e}")
         raise HTTPException(status_code=500, detail="Erreur interne du serveur")
@@ -178,29 +190,28 @@ async def change_avatar(identifier: str, file: UploadFile = File(...)):
     """Changer la photo de profil d'un utilisateur"""
     try:
         validate_image_file(file)
-        content = await file.read()
-
-        if len(content) > MAX_FILE_SIZE:
-            raise HTTPException(status_code=413, detail="Fichier trop volumineux")
 
         decoded_identifier = urllib.parse.unquote(identifier)
-        await cleanup_old_image(decoded_identifier, "avatar")
-
         ext = file.filename.split('.')[-1].lower()
-        filename = _create_safe_filename(decoded_identifier, "avatar", ext)
-        filepath = PROFILE_IMAGE_DIR / filename
 
-        async with aiofiles.open(filepath, "wb") as f:
-            await f.write(content)
+        # Lecture par blocs : rejet dès que MAX_FILE_SIZE est dépassé.
+        # Blob adressé par contenu : une image déjà connue n'est pas réécrite.
+        try:
+            blob = await blob_store.store_upload(file, ext, max_size=MAX_FILE_SIZE)
+        except UploadTooLargeError:
+            raise HTTPException(status_code=413, detail="Fichier trop volumineux")
+
+        await cleanup_old_image(decoded_identifier, "avatar")
 
-        url = f"/static/upload/profileImage/{filename}"
+        url = blob.url
+        variants = await ensure_variants(blob.path)
         profile = await services.update_profile_by_identifier(
             decoded_identifier, 
-            {"avatar_url": url}
+            {"avatar_url": url, "avatar_variants": _variant_urls(variants)}
         )
 
         if not profile:
-            filepath.unlink(missing_ok=True)
+            await blob_store.release(url)
             raise HTTPException(status_code=404, detail="Profil non trouvé")
 
         return {
@@ -221,29 +232,28 @@ async def change_cover(identifier: str, file: UploadFile = File(...)):
     """Changer la photo de couverture d'un utilisateur"""
     try:
         validate_image_file(file)
-        content = await file.read()
-
-        if len(content) > MAX_FILE_SIZE:
-            raise HTTPException(status_code=413, detail="Fichier trop volumineux")
 
         decoded_identifier = urllib.parse.unquote(identifier)
-        await cleanup_old_image(decoded_identifier, "cover")
-
         ext = file.filename.split('.')[-1].lower()
-        filename = _create_safe_filename(decoded_identifier, "cover", ext)
-        filepath = COVER_IMAGE_DIR / filename
 
-        async with aiofiles.open(filepath, "wb") as f:
-            await f.write(content)
+        # Lecture par blocs : rejet dès que MAX_FILE_SIZE est dépassé.
+        # Blob adressé par contenu : une image déjà connue n'est pas réécrite.
+        try:
+            blob = await blob_store.store_upload(file, ext, max_size=MAX_FILE_SIZE)
+        except UploadTooLargeError:
+            raise HTTPException(status_code=413, detail="Fichier trop volumineux")
 
-        url = f"/static/upload/coverImage/{filename}"
+        await cleanup_old_image(decoded_identifier, "cover")
+
+        url = blob.url
+        variants = await ensure_variants(blob.path)
         profile = await services.update_profile_by_identifier(
             decoded_identifier, 
-            {"coverPhoto": url}
+            {"coverPhoto": url, "cover_variants": _variant_urls(variants)}
         )
 
         if not profile:
-            filepath.unlink(missing_ok=True)
+            await blob_store.release(url)
             raise HTTPException(status_code=404, detail="Profil non trouvé")
 
         return {
@@ -260,33 +270,26 @@ async def change_cover(identifier: str, file: UploadFile = File(...)):
 
 # ➤ Met à jour le statut en ligne de l'utilisateur
 @router.post("/online")
-async def ping(user: UserProfile = Depends(get_current_user)):
+async def ping(user=Depends(get_current_user)):
     """
     Marque l'utilisateur comme en ligne et met à jour le champ `last_seen`
     """
-    result = await profiles_collection.update_one(
-        {"user_id": user.user_id},
-        {
-            "$set": {
-                "online_status": True,
-                "last_seen": datetime.utcnow()
-            }
-        }
-    )
-
-    if result.modified_count == 1:
-        return {"status": "online", "user_id": user.user_id}
-    else:
-        return {"status": "not_updated", "user_id": user.user_id}
+    now = presence.heartbeat(user.id)
+    # Écriture différée : regroupée avec les autres heartbeats dans un bulk_write
+    await heartbeat_buffer.add(user.id, {
+        "online_status": True,
+        "last_seen": now,
+        "last_activity": now
+    })
+    return {"status": "online", "user_id": user.id}
 
 
-# ➤ Met à jour les utilisateurs inactifs (déconnecte après 3 minutes)
-async def mark_users_offline_if_inactive():
-    timeout_limit = datetime.utcnow() - timedelta(minutes=3)
-    await profiles_collection.update_many(
-        {"last_seen": {"$lt": timeout_limit}},
-        {"$set": {"online_status": False}}
-    )
+def _profile_query(user_id: str) -> dict:
+    if user_id.isdigit():
+        return {"user_id": int(user_id)}
+    if ObjectId.is_valid(user_id):
+        return {"_id": ObjectId(user_id)}
+    raise HTTPException(status_code=400, detail="ID invalide")
 
 
 @router.get("/{user_id}")
@@ -299,41 +302,27 @@ async def get_user_profile(user_id: str, current_user=Depends(get_current_user))
             )
 
         # Identifier le profil cible
-        if user_id.isdigit():
-            query = {"user_id": int(user_id)}
-        elif ObjectId.is_valid(user_id):
-            query = {"_id": ObjectId(user_id)}
-        else:
-            raise HTTPException(status_code=400, detail="ID invalide")
+        query = _profile_query(user_id)
 
-        user = await profiles_collection.find_one(query)
+        # Le tableau historique "follow" n'est jamais nécessaire ici
+        user = await profiles_collection.find_one(query, {"follow": 0, "search_keys": 0})
         if not user:
             raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
 
+        # Incrément des vues : agrégé en mémoire, persisté périodiquement
+        profile_oid = user["_id"]
+        await profile_view_counter.increment(profile_oid, "views")
+        user["views"] = (user.get("views") or 0) + profile_view_counter.pending(profile_oid, "views")
+
         # Convertir l'ID Mongo en string pour le frontend
         user["_id"] = str(user["_id"])
 
-        # Incrément des vues
-        await profiles_collection.update_one(query, {"$inc": {"views": 1}})
-
-        # Vérifie si l'utilisateur courant suit ce profil
-        follow_list = user.get("follow", [])
-        # Comparaison sécurisée des types (int si possible, sinon string)
-        try:
-            current_user_id = int(current_user.id)
-            follow_list_int = [int(f) for f in follow_list if f is not None]
-            is_following = current_user_id in follow_list_int
-        except Exception:
-            # fallback string comparison
-            follow_list_str = [str(f) for f in follow_list if f is not None]
-            is_following = str(current_user.id) in follow_list_str
-
-        # LOG pour debug
-        logger.info(f"DEBUG: follow_list = {follow_list}")
-        logger.info(f"DEBUG: current_user.id = {current_user.id}")
-        logger.info(f"DEBUG: is_following = {is_following}")
-
-        user["is_following"] = is_following
+        # Vérifie si l'utilisateur courant suit ce profil (lookup indexé sur le graphe)
+        target_user_id = user.get("user_id")
+        user["is_following"] = (
+            target_user_id is not None
+            and await follows.is_following(int(current_user.id), int(target_user_id))
+        )
 
         # Mise en forme finale pour le frontend
         formatted_user = format_profile_for_frontend(user)
@@ -348,48 +337,39 @@ async def get_user_profile(user_id: str, current_user=Depends(get_current_user))
         raise HTTPException(status_code=500, detail="Erreur interne du serveur")
 
 
+async def _resolve_target_user_id(target_id: str) -> int:
+    """Retourne le user_id (int) du profil ciblé par un user_id ou un ObjectId"""
+    if target_id.isdigit():
+        query = {"user_id": int(target_id)}
+    elif ObjectId.is_valid(target_id):
+        query = {"_id": ObjectId(target_id)}
+    else:
+        raise HTTPException(status_code=400, detail="ID cible invalide.")
+
+    target = await profiles_collection.find_one(query, {"user_id": 1})
+    if not target or target.get("user_id") is None:
+        raise HTTPException(status_code=404, detail="Utilisateur cible introuvable.")
+    return int(target["user_id"])
+
+
+async def _followers_count(user_id: int) -> int:
+    profile = await profiles_collection.find_one({"user_id": user_id}, {"followers": 1})
+    return max(0, (profile or {}).get("followers", 0))
+
+
 @router.post("/{target_id}/follow", status_code=status.HTTP_200_OK)
 async def follow_user(target_id: str, current_user=Depends(get_current_user)):
     try:
+        followee_id = await _resolve_target_user_id(target_id)
+
         # Interdire de se suivre soi-même
-        if str(current_user.id) == target_id or (target_id.isdigit() and int(target_id) == current_user.id):
+        if followee_id == int(current_user.id):
             raise HTTPException(status_code=400, detail="Impossible de se suivre soi-même.")
 
-        # Construire la requête Mongo
-        if ObjectId.is_valid(target_id):
-            query = {"_id": ObjectId(target_id)}
-        elif target_id.isdigit():
-            query = {"user_id": int(target_id)}
-        else:
-            raise HTTPException(status_code=400, detail="ID cible invalide.")
-
-        # Vérifier que l'utilisateur cible existe
-        user_to_follow = await profiles_collection.find_one(query)
-        if not user_to_follow:
-            raise HTTPException(status_code=404, detail="Utilisateur à suivre introuvable.")
-
-        # Ajout sécurisé à la liste "follow"
-        update_result = await profiles_collection.update_one(
-            query,
-            {
-                "$addToSet": {"follow": current_user.id},
-                "$inc": {"followers": 1}
-            }
-        )
-
-        if update_result.modified_count == 0:
-            return {
-                "detail": "Vous suivez déjà cet utilisateur.",
-                "followers": user_to_follow.get("followers", 0)
-            }
-
-        # Récupérer le nouveau nombre de followers
-        updated_profile = await profiles_collection.find_one(query, {"followers": 1})
-        new_count = updated_profile.get("followers", 0)
-
+        created = await follows.follow(int(current_user.id), followee_id)
         return {
-            "detail": "Suivi avec succès.",
-            "followers": new_count
+            "detail": "Suivi avec succès." if created else "Vous suivez déjà cet utilisateur.",
+            "followers": await _followers_count(followee_id)
         }
 
     except HTTPException:
@@ -402,37 +382,50 @@ async def follow_user(target_id: str, current_user=Depends(get_current_user)):
 @router.post("/{target_id}/unfollow")
 async def unfollow_user(target_id: str, current_user=Depends(get_current_user)):
     try:
-        follower_user_id = current_user.id
-
-        if target_id.isdigit():
-            if int(target_id) == follower_user_id:
-                raise HTTPException(status_code=400, detail="Impossible de se désabonner de soi-même")
-            query = {"user_id": int(target_id)}
-        elif ObjectId.is_valid(target_id):
-            query = {"_id": ObjectId(target_id)}
-        else:
-            raise HTTPException(status_code=400, detail="ID cible invalide")
+        followee_id = await _resolve_target_user_id(target_id)
 
-        result = await profiles_collection.update_one(
-            query,
-            {"$pull": {"follow": follower_user_id}, "$inc": {"followers": -1}}
-        )
+        if followee_id == int(current_user.id):
+            raise HTTPException(status_code=400, detail="Impossible de se désabonner de soi-même")
 
-        if result.modified_count == 0:
+        removed = await follows.unfollow(int(current_user.id), followee_id)
+        if not removed:
             return {"detail": "Déjà non suivi ou aucune modification."}
 
-        updated_profile = await profiles_collection.find_one(query, {"followers": 1})
-        followers = max(0, updated_profile.get("followers", 0))
-        if followers == 0:
-            await profiles_collection.update_one(query, {"$set": {"followers": 0}})
-
-        return {"detail": "Ne suit plus l'utilisateur.", "followers": followers}
+        return {"detail": "Ne suit plus l'utilisateur.", "followers": await _followers_count(followee_id)}
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erreur dans unfollow_user: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Erreur interne du serveur")
 
 
+@router.get("/{user_id}/followers")
+async def get_followers(
+    user_id: int,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Curseur renvoyé par la page précédente")
+):
+    """Abonnés de l'utilisateur, paginés par curseur"""
+    if cursor and not ObjectId.is_valid(cursor):
+        raise HTTPException(status_code=400, detail="Curseur invalide")
+    ids, next_cursor = await follows.list_followers(user_id, limit, cursor)
+    return {"user_ids": ids, "next_cursor": next_cursor}
+
+
+@router.get("/{user_id}/following")
+async def get_following(
+    user_id: int,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Curseur renvoyé par la page précédente")
+):
+    """Comptes suivis par l'utilisateur, paginés par curseur"""
+    if cursor and not ObjectId.is_valid(cursor):
+        raise HTTPException(status_code=400, detail="Curseur invalide")
+    ids, next_cursor = await follows.list_following(user_id, limit, cursor)
+    return {"user_ids": ids, "next_cursor": next_cursor}
+
+
 @router.get("/{user_id}/status")
 async def get_user_status(
     user_id: str,
@@ -452,42 +445,40 @@ async def get_user_status(
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-    # 2. Récupération avec projection optimisée
+    # 2. Utilisateurs actifs sur ce processus : statut calculé en mémoire, sans Mongo
+    now = datetime.now(timezone.utc)
+    if "user_id" in query:
+        hot = presence.status(query["user_id"])
+        if hot:
+            return {
+                "online_status": hot["online_status"],
+                "last_seen": hot["last_seen"].isoformat(),
+                "computed_at": now.isoformat(),
+                "is_realtime": True
+            }
+
+    # 3. Sinon, récupération avec projection optimisée
     profile = await profiles_collection.find_one(
         query,
         {
             "_id": 0,
             "online_status": 1,
             "last_seen": 1,
-            "last_activity": 1  # Nouveau champ à suivre
+            "last_activity": 1
         }
     )
 
     if not profile:
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
 
-    # 3. Calcul du statut en temps réel
-    now = datetime.now(timezone.utc)
+    # 4. Statut dérivé de l'âge de la dernière activité
     last_seen = profile.get("last_seen")
     last_activity = profile.get("last_activity", last_seen)
+    if last_activity and last_activity.tzinfo is None:
+        last_activity = last_activity.replace(tzinfo=timezone.utc)
 
-    # 4. Détermination dynamique du statut
-    is_online = False
-    if last_activity:
-        # Solution 1: Ensure last_activity is timezone-aware
-        if last_activity.tzinfo is None:
-            # Assume UTC if no timezone info
-            last_activity = last_activity.replace(tzinfo=timezone.utc)
-        elif last_activity.tzinfo != timezone.utc:
-            # Convert to UTC if different timezone
-            last_activity = last_activity.astimezone(timezone.utc)
-        
-        time_diff = (now - last_activity).total_seconds()
-        is_online = time_diff < 300  # 5 minutes de tolérance
-
-    # 5. Réponse avec headers pour éviter le caching
     return {
-        "online_status": is_online or profile.get("online_status", False),
+        "online_status": effective_online(profile, now),
         "last_seen": last_activity.isoformat() if last_activity else None,
         "computed_at": now.isoformat(),
         "is_realtime": True
@@ -539,10 +530,19 @@ async def update_user_status(
         # User is online, update last_activity
         update_data["last_activity"] = datetime.now(timezone.utc)
 
-    result = await profiles_collection.update_one(query, {"$set": update_data})
-
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
+    if "user_id" in query:
+        # Lecture ponctuelle indexée (user_id) : l'écriture, elle, reste regroupée
+        if not await profiles_collection.find_one(query, {"_id": 1}):
+            raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
+        if online_status is False:
+            presence.mark_offline(query["user_id"])
+        else:
+            presence.heartbeat(query["user_id"], update_data.get("last_activity"))
+        await heartbeat_buffer.add(query["user_id"], update_data)
+    else:
+        result = await profiles_collection.update_one(query, {"$set": update_data})
+        if result.matched_count == 0:
+            raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
 
     return {
         "message": "Statut mis à jour",
@@ -550,14 +550,3 @@ async def update_user_status(
         "last_seen": update_data.get("last_seen").isoformat() if update_data.get("last_seen") else None
     }
 
-
-async def mark_users_offline_if_inactive():
-    """
-    Marque offline tous les users inactifs depuis > 3 minutes
-    """
-    timeout_limit = datetime.utcnow() - timedelta(minutes=3)
-    result = await profiles_collection.update_many(
-        {"last_seen": {"$lt": timeout_limit}},
-        {"$set": {"online_status": False}}
-    )
-    logger.info(f"Users offline updated: {result.modified_count}")
\ No newline at end of file
@@ -0,0 +1,14 @@
+# app/users/counters.py - Compteurs de profils agrégés en mémoire
+from app.config import settings
+from app.db.mongo import profiles_collection
+from app.utils.write_buffer import CoalescingCounterBuffer
+
+# Vues de profil : $inc regroupés par _id de profil
+profile_view_counter = CoalescingCounterBuffer(
+    profiles_collection,
+    key_field="_id",
+    flush_interval=settings.VIEW_COUNTER_FLUSH_SECONDS,
+    max_entries=settings.VIEW_COUNTER_FLUSH_MAX_ENTRIES,
+    max_pending=settings.VIEW_COUNTER_MAX_PENDING,
+    name="profile_views",
+)
@@ -0,0 +1,221 @@
+# app/users/follows.py - Graphe d'abonnements stocké en arêtes (follower -> followee)
+import logging
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from app.db.indexes import ensure_indexes
+from app.db.migrations import run_once
+from app.db.mongo import follows_collection, profiles_collection
+
+logger = logging.getLogger(__name__)
+
+
+async def follow(follower_id: int, followee_id: int) -> bool:
+    """
+    Crée l'arête follower -> followee. L'index unique garantit l'idempotence ;
+    les compteurs ne sont incrémentés que si l'arête vient d'être créée.
+    Retourne False si l'abonnement existait déjà.
+    """
+    try:
+        await follows_collection.insert_one({
+            "follower_id": follower_id,
+            "followee_id": followee_id,
+            "created_at": datetime.utcnow(),
+        })
+    except DuplicateKeyError:
+        return False
+
+    await profiles_collection.update_one({"user_id": followee_id}, {"$inc": {"followers": 1}})
+    await profiles_collection.update_one({"user_id": follower_id}, {"$inc": {"following": 1}})
+    return True
+
+
+async def unfollow(follower_id: int, followee_id: int) -> bool:
+    """Supprime l'arête ; les compteurs ne bougent que si elle existait"""
+    result = await follows_collection.delete_one({
+        "follower_id": follower_id,
+        "followee_id": followee_id,
+    })
+    if result.deleted_count == 0:
+        return False
+
+    await profiles_collection.update_one({"user_id": followee_id}, {"$inc": {"followers": -1}})
+    await profiles_collection.update_one({"user_id": follower_id}, {"$inc": {"following": -1}})
+    return True
+
+
+async def is_following(follower_id: int, followee_id: int) -> bool:
+    """Recherche ponctuelle sur l'index unique (follower_id, followee_id)"""
+    edge = await follows_collection.find_one(
+        {"follower_id": follower_id, "followee_id": followee_id},
+        {"_id": 1}
+    )
+    return edge is not None
+
+
+async def _list_edges(
+    match_field: str,
+    other_field: str,
+    user_id: int,
+    limit: int,
+    cursor: Optional[str]
+) -> Tuple[List[int], Optional[str]]:
+    query = {match_field: user_id}
+    if cursor:
+        query["_id"] = {"$lt": ObjectId(cursor)}
+
+    edges = await (
+        follows_collection.find(query, {other_field: 1})
+        .sort("_id", -1)
+        .limit(limit + 1)
+        .to_list(length=limit + 1)
+    )
+    next_cursor = None
+    if len(edges) > limit:
+        edges = edges[:limit]
+        next_cursor = str(edges[-1]["_id"])
+    return [edge[other_field] for edge in edges], next_cursor
+
+
+async def list_followers(user_id: int, limit: int = 50, cursor: Optional[str] = None):
+    """IDs des abonnés de user_id, du plus récent au plus ancien, + curseur suivant"""
+    return await _list_edges("followee_id", "follower_id", user_id, limit, cursor)
+
+
+async def list_following(user_id: int, limit: int = 50, cursor: Optional[str] = None):
+    """IDs des comptes suivis par user_id, du plus récent au plus ancien, + curseur suivant"""
+    return await _list_edges("follower_id", "followee_id", user_id, limit, cursor)
+
+
+async def migrate_follow_arrays(batch_size: int = 1000) -> int:
+    """
+    Migre les anciens tableaux `follow` (abonnés stockés dans le profil suivi,
+    ids int ou str) vers la collection d'arêtes, recalcule `followers`
+    puis retire le tableau du document. Idempotent.
+    `following` des abonnés concernés est recalculé à la fin depuis les arêtes :
+    follow() / unfollow() l'incrémentent ensuite à partir d'une base juste.
+    """
+    migrated = 0
+    touched_followers = set()
+    cursor = profiles_collection.find(
+        {"follow": {"$exists": True}},
+        {"user_id": 1, "follow": 1}
+    )
+    async for profile in cursor:
+        followee_id = profile.get("user_id")
+        if followee_id is None:
+            continue
+
+        follower_ids = set()
+        for raw in profile.get("follow") or []:
+            try:
+                follower_ids.add(int(raw))
+            except (TypeError, ValueError):
+                continue
+
+        touched_followers.update(follower_ids)
+        operations = [
+            InsertOne({"follower_id": fid, "followee_id": followee_id, "created_at": datetime.utcnow()})
+            for fid in follower_ids
+        ]
+        for start in range(0, len(operations), batch_size):
+            try:
+                await follows_collection.bulk_write(operations[start:start + batch_size], ordered=False)
+            except BulkWriteError as e:
+                # Arêtes déjà présentes (index unique) : seules les erreurs E11000 sont attendues
+                if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                    raise
+
+        followers = await follows_collection.count_documents({"followee_id": followee_id})
+        await profiles_collection.update_one(
+            {"_id": profile["_id"]},
+            {"$set": {"followers": followers}, "$unset": {"follow": ""}}
+        )
+        migrated += 1
+
+    await _recompute_following(sorted(touched_followers), batch_size)
+
+    if migrated:
+        logger.info(f"Tableaux follow migrés vers le graphe: {migrated} profils")
+    return migrated
+
+
+async def _recompute_following(follower_ids: List[int], batch_size: int = 1000) -> None:
+    """Fixe `following` depuis les arêtes ($group par follower_id), par lots d'ids"""
+    for start in range(0, len(follower_ids), batch_size):
+        batch = follower_ids[start:start + batch_size]
+        counts = {fid: 0 for fid in batch}
+        pipeline = [
+            {"$match": {"follower_id": {"$in": batch}}},
+            {"$group": {"_id": "$follower_id", "count": {"$sum": 1}}},
+        ]
+        async for row in follows_collection.aggregate(pipeline):
+            counts[row["_id"]] = row["count"]
+        await profiles_collection.bulk_write(
+            [UpdateOne({"user_id": fid}, {"$set": {"following": count}}) for fid, count in counts.items()],
+            ordered=False,
+        )
+
+
+async def run_follow_migration() -> None:
+    """
+    Tâche de démarrage : crée d'abord les index de follows (l'index unique
+    follower_followee est ce qui dédoublonne les arêtes migrées), puis lance
+    migrate_follow_arrays une seule fois, quel que soit le nombre de workers.
+    """
+    await ensure_indexes(["follows"])
+    indexes = await follows_collection.index_information()
+    if "follower_followee" not in indexes:
+        logger.error("Index unique follower_followee absent : migration des tableaux follow reportée")
+        return
+    try:
+        await run_once("follow_arrays_to_edges", migrate_follow_arrays)
+    except Exception as e:
+        logger.error(f"Erreur migration des tableaux follow: {e}")
+
+
+async def remove_user_edges(user_id: int, batch_size: int = 1000) -> int:
+    """
+    Supprime toutes les arêtes d'un utilisateur (profil supprimé) et décrémente
+    les compteurs des comptes à l'autre bout. Retourne le nombre d'arêtes supprimées.
+    """
+    removed = 0
+    for match_field, other_field, counter in (
+        ("follower_id", "followee_id", "followers"),
+        ("followee_id", "follower_id", "following"),
+    ):
+        while True:
+            edges = await (
+                follows_collection.find({match_field: user_id}, {other_field: 1})
+                .limit(batch_size)
+                .to_list(length=batch_size)
+            )
+            if not edges:
+                break
+            result = await follows_collection.delete_many({"_id": {"$in": [edge["_id"] for edge in edges]}})
+            # Les arêtes déjà supprimées par un appel concurrent ne sont pas décomptées deux fois
+            if result.deleted_count == len(edges):
+                await profiles_collection.bulk_write(
+                    [UpdateOne({"user_id": edge[other_field]}, {"$inc": {counter: -1}}) for edge in edges],
+                    ordered=False,
+                )
+            else:
+                for edge in edges:
+                    await reconcile_follow_counters(edge[other_field])
+            removed += result.deleted_count
+    return removed
+
+
+async def reconcile_follow_counters(user_id: int) -> dict:
+    """Recalcule followers / following depuis les arêtes (réparation en cas de dérive)"""
+    followers = await follows_collection.count_documents({"followee_id": user_id})
+    following = await follows_collection.count_documents({"follower_id": user_id})
+    await profiles_collection.update_one(
+        {"user_id": user_id},
+        {"$set": {"followers": followers, "following": following}}
+    )
+    return {"followers": followers, "following": following}
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, EmailStr, ConfigDict
-from typing import Optional, List, Union
+from typing import Optional, List, Union, Dict
 from datetime import datetime
 from bson import ObjectId
 from enum import Enum
@@ -31,6 +31,8 @@ class UserProfile(BaseModel):
     website: Optional[str] = None
     avatar_url: Optional[str] = None
     coverPhoto: Optional[str] = None
+    avatar_variants: Optional[Dict[str, str]] = None   # thumb / list / full
+    cover_variants: Optional[Dict[str, str]] = None
     online_status: Optional[bool] = False
     last_seen: Optional[datetime] = None
 
@@ -67,6 +69,27 @@ class UserProfile(BaseModel):
     )
 
 
+# ────────────────────────────────
+# AMI (projection légère pour les listes)
+# ────────────────────────────────
+class FriendSummary(BaseModel):
+    id: Optional[str] = Field(None, alias="_id")
+    user_id: Optional[Union[int, str]] = None
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    username: Optional[str] = None
+    avatar_url: Optional[str] = None
+    online_status: Optional[bool] = False
+    last_activity: Optional[datetime] = None
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class FriendListResponse(BaseModel):
+    friends: List[FriendSummary]
+    next_cursor: Optional[str] = None
+
+
 # ────────────────────────────────
 # MISE À JOUR DU PROFIL (option simplifiée pour update partiel)
 # ────────────────────────────────
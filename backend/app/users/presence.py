@@ -0,0 +1,147 @@
+# app/users/presence.py - Présence en ligne calculée en mémoire à partir des heartbeats
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from pymongo import UpdateOne
+
+from app.config import settings
+from app.db.mongo import profiles_collection
+from app.utils.write_buffer import CoalescingWriteBuffer
+
+logger = logging.getLogger(__name__)
+
+# Un utilisateur est en ligne si son dernier heartbeat date de moins de ONLINE_TIMEOUT
+ONLINE_TIMEOUT = timedelta(minutes=5)
+SWEEP_INTERVAL_SECONDS = 60
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def is_recent(last_activity: Optional[datetime], now: Optional[datetime] = None) -> bool:
+    if not last_activity:
+        return False
+    now = now or datetime.now(timezone.utc)
+    return now - _as_utc(last_activity) < ONLINE_TIMEOUT
+
+
+def effective_online(profile: dict, now: Optional[datetime] = None) -> bool:
+    """
+    Statut en ligne d'un document profil lu dans Mongo : online_status n'est
+    fiable que si la dernière activité est récente (un worker arrêté ne remet
+    jamais le drapeau à False).
+    """
+    last_activity = profile.get("last_activity") or profile.get("last_seen")
+    return bool(profile.get("online_status")) and is_recent(last_activity, now)
+
+
+def apply_presence(profile: dict, now: Optional[datetime] = None) -> dict:
+    """Remplace online_status par sa valeur effective (chemins de lecture)"""
+    if "online_status" in profile:
+        profile["online_status"] = effective_online(profile, now)
+    return profile
+
+
+class PresenceTracker:
+    """
+    Carte user_id -> dernier heartbeat, propre au processus.
+    Le statut en ligne est dérivé de l'âge du heartbeat à la lecture ;
+    last_seen n'est persisté dans Mongo qu'au moment où l'utilisateur expire,
+    par lots (un seul bulk_write par balayage).
+    La carte est bornée à max_entries : au-delà, l'entrée la moins récemment
+    rafraîchie est oubliée (sa dernière activité est déjà dans le tampon
+    d'écriture, la lecture retombe alors sur Mongo).
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._last_heartbeat: "OrderedDict[int, datetime]" = OrderedDict()
+
+    def heartbeat(self, user_id: int, at: Optional[datetime] = None) -> datetime:
+        at = _as_utc(at) if at else datetime.now(timezone.utc)
+        self._last_heartbeat[user_id] = at
+        self._last_heartbeat.move_to_end(user_id)
+        while len(self._last_heartbeat) > self.max_entries:
+            self._last_heartbeat.popitem(last=False)
+        return at
+
+    def mark_offline(self, user_id: int) -> None:
+        self._last_heartbeat.pop(user_id, None)
+
+    def status(self, user_id: int) -> Optional[dict]:
+        """
+        Statut « en ligne » depuis la mémoire, ou None si l'utilisateur n'a pas
+        de heartbeat récent ici : un autre worker peut en avoir reçu un plus
+        récent, la valeur durable de Mongo fait alors foi.
+        """
+        last = self._last_heartbeat.get(user_id)
+        if last is None or not is_recent(last):
+            return None
+        return {"online_status": True, "last_seen": last}
+
+    async def sweep(self) -> int:
+        """Retire les utilisateurs expirés et persiste leur last_seen en un lot"""
+        now = datetime.now(timezone.utc)
+        expired = {
+            user_id: last
+            for user_id, last in self._last_heartbeat.items()
+            if not is_recent(last, now)
+        }
+        for user_id in expired:
+            self._last_heartbeat.pop(user_id, None)
+        return await self._persist_offline(expired)
+
+    async def close(self) -> int:
+        """Arrêt du worker : persiste last_seen de tous les utilisateurs suivis ici et vide la carte"""
+        tracked = dict(self._last_heartbeat)
+        self._last_heartbeat.clear()
+        return await self._persist_offline(tracked)
+
+    async def _persist_offline(self, entries: Dict[int, datetime]) -> int:
+        if not entries:
+            return 0
+
+        # Conditionnel : avec plusieurs workers, un autre a pu persister une
+        # activité plus récente que le dernier heartbeat vu ici ; elle est conservée
+        operations = [
+            UpdateOne(
+                {
+                    "user_id": user_id,
+                    "$or": [
+                        {"last_activity": {"$lte": last}},
+                        {"last_activity": {"$exists": False}},
+                    ],
+                },
+                {"$set": {"online_status": False, "last_seen": last, "last_activity": last}}
+            )
+            for user_id, last in entries.items()
+        ]
+        try:
+            await profiles_collection.bulk_write(operations, ordered=False)
+        except Exception as e:
+            logger.error(f"Erreur persistance présence ({len(operations)} utilisateurs): {e}")
+        return len(operations)
+
+    async def run_sweeper(self) -> None:
+        while True:
+            await asyncio.sleep(SWEEP_INTERVAL_SECONDS)
+            await self.sweep()
+
+
+presence = PresenceTracker(settings.PRESENCE_MAX_TRACKED)
+
+# Écritures de last_seen / last_activity regroupées (dernière valeur par utilisateur)
+heartbeat_buffer = CoalescingWriteBuffer(
+    profiles_collection,
+    key_field="user_id",
+    flush_interval=settings.HEARTBEAT_FLUSH_SECONDS,
+    max_entries=settings.HEARTBEAT_FLUSH_MAX_ENTRIES,
+    max_pending=settings.HEARTBEAT_MAX_PENDING,
+    name="heartbeats",
+)
@@ -0,0 +1,199 @@
+# app/users/search.py - Recherche indexée des profils utilisateurs
+import logging
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional
+
+from pymongo import ASCENDING, TEXT, UpdateOne
+
+from app.db.mongo import profiles_collection
+
+logger = logging.getLogger(__name__)
+
+# Champs normalisés stockés dans le sous-document "search_keys" de chaque profil
+SEARCH_FIELDS = ("first_name", "last_name", "username", "email", "phone")
+
+SEARCH_INDEXES = [
+    {"keys": [(f"search_keys.{field}", ASCENDING)], "name": f"search_{field}"}
+    for field in SEARCH_FIELDS
+] + [
+    {
+        "keys": [("search_keys.text", TEXT)],
+        "name": "search_text",
+        "default_language": "none",
+    },
+]
+
+
+def normalize_search_key(value: Any) -> str:
+    """Minuscules, sans accents ni espaces superflus : "Émilie " -> "emilie\""""
+    if value is None:
+        return ""
+    text = unicodedata.normalize("NFKD", str(value))
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(text.lower().split())
+
+
+def normalize_phone(value: Any) -> str:
+    """Ne garde que les chiffres du numéro de téléphone"""
+    return re.sub(r"\D", "", str(value)) if value else ""
+
+
+def build_search_keys(profile: Dict[str, Any]) -> Dict[str, str]:
+    """Construit le sous-document search_keys à partir d'un document profil"""
+    keys = {
+        "first_name": normalize_search_key(profile.get("first_name")),
+        "last_name": normalize_search_key(profile.get("last_name")),
+        "username": normalize_search_key(profile.get("username")),
+        "email": normalize_search_key(profile.get("email")),
+        "phone": normalize_phone(profile.get("phone")),
+    }
+    keys["text"] = " ".join(value for value in keys.values() if value)
+    return keys
+
+
+def with_search_keys(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """Ajoute search_keys à un document avant insertion"""
+    profile["search_keys"] = build_search_keys(profile)
+    return profile
+
+
+async def backfill_search_keys(batch_size: int = 1000) -> int:
+    """Renseigne search_keys pour les profils existants qui n'en ont pas encore"""
+    cursor = profiles_collection.find(
+        {"search_keys": {"$exists": False}},
+        {field: 1 for field in SEARCH_FIELDS}
+    )
+    updated = 0
+    operations = []
+    async for profile in cursor:
+        operations.append(UpdateOne(
+            {"_id": profile["_id"]},
+            {"$set": {"search_keys": build_search_keys(profile)}}
+        ))
+        if len(operations) >= batch_size:
+            await profiles_collection.bulk_write(operations, ordered=False)
+            updated += len(operations)
+            operations = []
+    if operations:
+        await profiles_collection.bulk_write(operations, ordered=False)
+        updated += len(operations)
+    logger.info(f"search_keys renseignés pour {updated} profils")
+    return updated
+
+
+def _rank(profile: Dict[str, Any], term: str) -> int:
+    """Score de pertinence : correspondance exacte > préfixe du nom > préfixe d'un autre champ"""
+    keys = profile.get("search_keys") or {}
+    first, last = keys.get("first_name", ""), keys.get("last_name", "")
+    full_name = f"{first} {last}".strip()
+    if term in (first, last, full_name, keys.get("username", ""), keys.get("email", "")):
+        return 0
+    if full_name.startswith(term) or first.startswith(term) or last.startswith(term):
+        return 1
+    if keys.get("username", "").startswith(term):
+        return 2
+    return 3
+
+
+async def _fill(
+    results: List[Dict[str, Any]],
+    seen: set,
+    query: Dict[str, Any],
+    projection: Optional[Dict[str, int]],
+    limit: int,
+    sort_key: Optional[str] = None
+) -> None:
+    """Complète `results` jusqu'à `limit` avec les documents de `query` non encore retenus"""
+    remaining = limit - len(results)
+    if remaining <= 0:
+        return
+    if seen:
+        query = {"$and": [query, {"_id": {"$nin": list(seen)}}]}
+    cursor = profiles_collection.find(query, projection)
+    if sort_key:
+        cursor = cursor.sort(sort_key, ASCENDING)
+    async for doc in cursor.limit(remaining):
+        seen.add(doc["_id"])
+        results.append(doc)
+
+
+async def autocomplete_profiles(
+    q: str,
+    projection: Optional[Dict[str, int]] = None,
+    limit: int = 50
+) -> List[Dict[str, Any]]:
+    """
+    Recherche par préfixe servie par les index search_keys.*, par niveaux de pertinence :
+    1. correspondances exactes (lectures ponctuelles sur les index)
+    2. préfixes du prénom / nom, puis du username, puis de l'email et du téléphone,
+       chaque requête triée sur sa clé indexée (regex ancrée = parcours de plage d'index)
+    Un niveau ne complète que les places laissées par les précédents : une
+    correspondance exacte n'est jamais évincée par des préfixes.
+    """
+    term = normalize_search_key(q)
+    if not term:
+        return []
+
+    if projection is not None:
+        projection = {**projection, "_id": 1, "search_keys": 1}
+
+    phone = normalize_phone(q)
+    results: List[Dict[str, Any]] = []
+    seen: set = set()
+
+    # 1. Égalités
+    exact = [
+        {"search_keys.first_name": term},
+        {"search_keys.last_name": term},
+        {"search_keys.username": term},
+        {"search_keys.email": term},
+    ]
+    first, _, rest = term.partition(" ")
+    if rest:
+        exact.append({"search_keys.first_name": first, "search_keys.last_name": rest})
+    if phone:
+        exact.append({"search_keys.phone": phone})
+    if q.strip().isdigit():
+        exact.append({"user_id": int(q.strip())})
+    await _fill(results, seen, {"$or": exact}, projection, limit)
+
+    # 2. Préfixes, champ par champ, dans l'ordre de pertinence
+    prefix = {"$regex": f"^{re.escape(term)}"}
+    if rest:
+        await _fill(
+            results, seen,
+            {"search_keys.first_name": first, "search_keys.last_name": {"$regex": f"^{re.escape(rest)}"}},
+            projection, limit, "search_keys.last_name"
+        )
+    for field in ("first_name", "last_name", "username", "email"):
+        key = f"search_keys.{field}"
+        await _fill(results, seen, {key: prefix}, projection, limit, key)
+    if phone:
+        await _fill(results, seen, {"search_keys.phone": {"$regex": f"^{phone}"}}, projection, limit, "search_keys.phone")
+
+    # Tri stable : l'ordre des niveaux est conservé à score égal
+    results.sort(key=lambda doc: _rank(doc, term))
+    return results
+
+
+async def text_search_profiles(
+    q: str,
+    projection: Optional[Dict[str, int]] = None,
+    limit: int = 50
+) -> List[Dict[str, Any]]:
+    """Recherche "flexible" par mots, servie par l'index texte et triée par score"""
+    term = normalize_search_key(q)
+    if not term:
+        return []
+
+    projection = dict(projection or {})
+    projection["score"] = {"$meta": "textScore"}
+
+    cursor = (
+        profiles_collection.find({"$text": {"$search": term}}, projection)
+        .sort([("score", {"$meta": "textScore"})])
+        .limit(limit)
+    )
+    return [doc async for doc in cursor]
+
@@ -1,5 +1,9 @@
 from app.db.mongo import profiles_collection
 from app.users.models import UserProfile
+from app.users.search import with_search_keys, build_search_keys, SEARCH_FIELDS
+from app.users.follows import remove_user_edges
+from app.users.presence import apply_presence
+from app.utils.serialization import trusted
 from typing import List, Optional, Dict, Any
 import logging
 from datetime import datetime
@@ -26,7 +30,7 @@ async def create_user_profile(profile: UserProfile) -> UserProfile:
         if not profile_dict.get("cover_photo_url"):
             profile_dict["cover_photo_url"] = "https://images.unsplash.com/photo-1506905925346-21bda4d32df4?w=400&h=200&fit=crop"
         
-        result = await profiles_collection.insert_one(profile_dict)
+        result = await profiles_collection.insert_one(with_search_keys(profile_dict))
         
         if result.inserted_id:
             created_profile = await profiles_collection.find_one({"_id": result.inserted_id})
@@ -70,6 +74,7 @@ async def get_profile_by_identifier(identifier: str) -> Optional[UserProfile]:
         
         if profile_data:
             profile_data["_id"] = str(profile_data["_id"])
+            apply_presence(profile_data)
 
             # ✅ Correction du type des valeurs dans follow
             if "follow" in profile_data and isinstance(profile_data["follow"], list):
@@ -92,6 +97,12 @@ async def update_profile_by_identifier(identifier: str, update_data: Dict[str, A
             return None
 
         update_data["updated_at"] = datetime.utcnow()
+
+        # Garder les clés de recherche normalisées synchronisées
+        if any(field in update_data for field in SEARCH_FIELDS):
+            merged = profile.model_dump()
+            merged.update(update_data)
+            update_data["search_keys"] = build_search_keys(merged)
         
         # Utiliser l'email comme clé unique pour la mise à jour
         result = await profiles_collection.update_one(
@@ -107,6 +118,7 @@ async def update_profile_by_identifier(identifier: str, update_data: Dict[str, A
         
         if updated_profile:
             updated_profile["_id"] = str(updated_profile["_id"])
+            apply_presence(updated_profile)
 
             # ✅ Correction du type des valeurs dans follow
             if "follow" in updated_profile and isinstance(updated_profile["follow"], list):
@@ -130,6 +142,9 @@ async def delete_profile_by_identifier(identifier: str) -> bool:
 
         # Supprimer par email (clé unique)
         result = await profiles_collection.delete_one({"email": profile.email})
+        if result.deleted_count and str(profile.user_id).isdigit():
+            # Arêtes d'abonnement et compteurs des comptes liés
+            await remove_user_edges(int(profile.user_id))
         return result.deleted_count > 0
     except Exception as e:
         logger.error(f"Erreur suppression profil pour {identifier}: {e}")
@@ -141,17 +156,19 @@ async def get_user_profiles(skip: int = 0, limit: int = 100) -> List[UserProfile
     Récupère une liste paginée de profils utilisateur.
     """
     try:
-        cursor = profiles_collection.find().skip(skip).limit(limit)
+        cursor = profiles_collection.find({}, {"search_keys": 0}).skip(skip).limit(limit)
         profiles = []
 
         async for profile_data in cursor:
             profile_data["_id"] = str(profile_data["_id"])
+            apply_presence(profile_data)
 
             # ✅ Correction du type des valeurs dans follow
             if "follow" in profile_data and isinstance(profile_data["follow"], list):
                 profile_data["follow"] = [str(f) for f in profile_data["follow"] if f is not None]
 
-            profiles.append(UserProfile(**profile_data))
+            # Données produites par l'application : pas de revalidation EmailStr
+            profiles.append(trusted(UserProfile, profile_data))
 
         return profiles
     except Exception as e:
@@ -241,3 +258,28 @@ def parse_experience(experience_text: str):
             "duration": "",
             "description": experience_text.strip()
         }]
+
+
+async def get_profiles_by_user_ids(user_ids, fields=("avatar_url",)) -> Dict[int, dict]:
+    """
+    Charge en une seule requête ($in) les champs demandés pour un lot de user_id.
+    Retourne un dictionnaire user_id -> sous-document projeté.
+    """
+    ids = {uid for uid in user_ids if uid is not None}
+    if not ids:
+        return {}
+
+    projection = {"_id": 0, "user_id": 1}
+    projection.update({field: 1 for field in fields})
+
+    profiles = {}
+    cursor = profiles_collection.find({"user_id": {"$in": list(ids)}}, projection)
+    async for profile in cursor:
+        profiles[profile["user_id"]] = profile
+    return profiles
+
+
+async def get_avatar_map(user_ids) -> Dict[int, Optional[str]]:
+    """Raccourci : user_id -> avatar_url pour un lot d'utilisateurs"""
+    profiles = await get_profiles_by_user_ids(user_ids, fields=("avatar_url",))
+    return {uid: profile.get("avatar_url") for uid, profile in profiles.items()}
@@ -0,0 +1,193 @@
+# app/utils/blob_store.py - Stockage des uploads adressé par contenu (SHA-256), dédupliqué et compté
+import asyncio
+import hashlib
+import logging
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional, Union
+
+from fastapi import UploadFile
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.db.mongo import blobs_collection
+from app.utils.storage import storage
+from app.utils.uploads import save_upload_stream, write_atomic, DEFAULT_MAX_UPLOAD_SIZE
+
+logger = logging.getLogger(__name__)
+
+BLOB_ROOT = Path("static/upload/blobs")
+BLOB_TMP_DIR = BLOB_ROOT / "tmp"
+BLOB_URL_PREFIX = f"/{BLOB_ROOT.as_posix()}/"
+
+# Attente maximale d'une purge en cours sur le même contenu (~1,4 s au total)
+COMMIT_RETRIES = 8
+COMMIT_RETRY_DELAY = 0.05
+
+
+@dataclass
+class Blob:
+    digest: str
+    path: Path
+    size: int
+    created: bool  # False : contenu déjà présent, seule la référence a été ajoutée
+
+    @property
+    def url(self) -> str:
+        return f"/{self.path.as_posix()}"
+
+
+def blob_path(digest: str, extension: str) -> Path:
+    """static/upload/blobs/ab/cd/abcd....ext : deux niveaux pour garder des dossiers courts"""
+    return BLOB_ROOT / digest[:2] / digest[2:4] / f"{digest}.{extension.lower()}"
+
+
+def digest_from_url(url: Optional[str]) -> Optional[str]:
+    """Digest d'une URL (/static/...) ou d'un chemin (static/...) de blob, None sinon"""
+    if not url:
+        return None
+    path = url.lstrip("/")
+    if not path.startswith(BLOB_ROOT.as_posix() + "/"):
+        return None
+    stem = path.rsplit("/", 1)[-1].split(".", 1)[0]
+    # Les déclinaisons ({digest}_thumb.webp) appartiennent au blob, pas de référence propre
+    if "_" in stem:
+        return None
+    return stem
+
+
+async def _add_reference(digest: str, size: int, extension: str) -> dict:
+    """
+    Upsert du document avec une référence de plus. Un blob marqué « deleting »
+    (suppression en cours par collect_garbage) est exclu du filtre : l'upsert
+    entre alors en conflit sur _id et l'on attend que la purge ait retiré le
+    document avant de le recréer, fichier compris.
+    """
+    for attempt in range(COMMIT_RETRIES):
+        now = datetime.now(timezone.utc)
+        try:
+            return await blobs_collection.find_one_and_update(
+                {"_id": digest, "deleting": {"$exists": False}},
+                {
+                    "$inc": {"refs": 1},
+                    "$set": {"updated_at": now},
+                    # Le premier chemin gagne : même contenu envoyé en .jpg puis .jpeg = un seul fichier
+                    "$setOnInsert": {"path": blob_path(digest, extension).as_posix(), "size": size, "created_at": now},
+                },
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            await asyncio.sleep(COMMIT_RETRY_DELAY * (attempt + 1))
+    raise RuntimeError(f"Blob {digest} en cours de suppression, réessayez")
+
+
+async def _commit(temp_path: Path, digest: str, size: int, extension: str) -> Blob:
+    """Ajoute une référence au blob puis place le fichier s'il n'existe pas encore"""
+    doc = await _add_reference(digest, size, extension)
+    destination = Path(doc["path"])
+
+    # Le document n'est pas marqué « deleting » : aucune purge ne peut supprimer
+    # le fichier tant que cette référence existe, exists() est donc fiable ici
+    if await storage.exists(destination):
+        await storage.unlink(temp_path)
+        return Blob(digest=digest, path=destination, size=size, created=False)
+
+    await storage.makedirs(destination.parent)
+    await storage.replace(temp_path, destination)
+    return Blob(digest=digest, path=destination, size=size, created=True)
+
+
+async def store_upload(file: UploadFile, extension: str, max_size: int = DEFAULT_MAX_UPLOAD_SIZE) -> Blob:
+    """
+    Enregistre un UploadFile (lecture en flux, taille bornée) et retourne le blob
+    correspondant. Un contenu identique n'est stocké qu'une fois.
+    """
+    temp_path = BLOB_TMP_DIR / uuid.uuid4().hex
+    stored = await save_upload_stream(file, temp_path, max_size=max_size)
+    try:
+        return await _commit(temp_path, stored.sha256, stored.size, extension)
+    except BaseException:
+        await storage.unlink(temp_path)
+        raise
+
+
+async def store_bytes(content: bytes, extension: str) -> Blob:
+    """Équivalent de store_upload pour un contenu déjà en mémoire"""
+    temp_path = BLOB_TMP_DIR / uuid.uuid4().hex
+    await write_atomic(temp_path, content)
+    try:
+        return await _commit(temp_path, hashlib.sha256(content).hexdigest(), len(content), extension)
+    except BaseException:
+        await storage.unlink(temp_path)
+        raise
+
+
+async def release(url: Optional[str]) -> bool:
+    """
+    Retire une référence. Le fichier n'est pas supprimé ici : collect_garbage
+    s'en charge une fois le délai de grâce écoulé, ce qui évite de supprimer
+    un blob qu'un upload concurrent est en train de référencer de nouveau.
+    False si l'URL n'est pas un blob.
+    """
+    digest = digest_from_url(url)
+    if not digest:
+        return False
+    await blobs_collection.update_one(
+        {"_id": digest, "refs": {"$gt": 0}},
+        {"$inc": {"refs": -1}, "$set": {"updated_at": datetime.now(timezone.utc)}},
+    )
+    return True
+
+
+def _remove_blob_files(path: Path) -> None:
+    path.unlink(missing_ok=True)
+    # Déclinaisons générées à côté du blob ({digest}_{nom}.webp)
+    for variant in path.parent.glob(f"{path.stem}_*"):
+        variant.unlink(missing_ok=True)
+
+
+async def collect_garbage(grace_seconds: float) -> int:
+    """
+    Supprime les blobs sans référence depuis plus de grace_seconds. Retourne le nombre supprimé.
+    Chaque blob est d'abord réservé (deleting = jeton propre à ce passage) : _commit
+    ignore alors le document, puis les fichiers sont supprimés, puis
+    le document. Un upload identique concurrent attend la fin et réécrit le fichier.
+    Une réservation plus ancienne que grace_seconds (purge interrompue) est reprise.
+    """
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(seconds=grace_seconds)
+    token = uuid.uuid4().hex
+    removed = 0
+    while True:
+        doc = await blobs_collection.find_one_and_update(
+            {
+                "refs": {"$lte": 0},
+                "updated_at": {"$lt": cutoff},
+                "$or": [
+                    {"deleting": {"$exists": False}},
+                    {"deleting_since": {"$lt": cutoff}},
+                ],
+            },
+            {"$set": {"deleting": token, "deleting_since": datetime.now(timezone.utc)}},
+        )
+        if not doc:
+            break
+        await storage.run("remove_blob", _remove_blob_files, Path(doc["path"]))
+        await blobs_collection.delete_one({"_id": doc["_id"], "deleting": token})
+        removed += 1
+    if removed:
+        logger.info(f"{removed} blob(s) sans référence supprimé(s)")
+    return removed
+
+
+async def run_garbage_collector(interval: float, grace_seconds: float) -> None:
+    """Tâche de fond : purge périodique des blobs orphelins"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await collect_garbage(grace_seconds)
+        except Exception as e:
+            logger.error(f"Erreur purge des blobs: {e}")
@@ -4,6 +4,12 @@ import shutil
 from typing import Dict, List
 from pathlib import Path
 
+from fastapi import UploadFile
+
+from app.utils import blob_store
+from app.utils.storage import storage
+from app.utils.uploads import DEFAULT_MAX_UPLOAD_SIZE
+
 class ImageManager:
     """Gestionnaire pour l'organisation des images"""
     
@@ -44,8 +50,12 @@ class ImageManager:
             }
     
     @classmethod
-    def move_image(cls, source_path: str, image_type: str) -> str:
-        """Déplace une image vers le bon dossier"""
+    async def move_image(cls, source_path: str, image_type: str) -> str:
+        """Déplace une image vers le bon dossier (sur le pool du service de stockage)"""
+        return await storage.run("move_image", cls._move_image, source_path, image_type)
+
+    @classmethod
+    def _move_image(cls, source_path: str, image_type: str) -> str:
         cls.setup_directories()
         
         if not os.path.exists(source_path):
@@ -78,8 +88,12 @@ class ImageManager:
         return destination_path
     
     @classmethod
-    def scan_old_uploads(cls) -> List[Dict]:
+    async def scan_old_uploads(cls) -> List[Dict]:
         """Scanne le dossier upload pour trouver les images à réorganiser"""
+        return await storage.run("scan_old_uploads", cls._scan_old_uploads)
+
+    @classmethod
+    def _scan_old_uploads(cls) -> List[Dict]:
         orphaned_images = []
         
         if not os.path.exists(cls.OLD_UPLOAD_DIR):
@@ -123,34 +137,27 @@ class ImageManager:
                     # Le dossier n'est pas vide, c'est normal
                     pass
 
-# Fonction d'aide pour FastAPI
-def save_uploaded_file(file_content: bytes, filename: str, image_type: str) -> str:
-    """Sauvegarde un fichier uploadé dans le bon dossier"""
-    ImageManager.setup_directories()
-    
-    # Déterminer le dossier de destination
-    if image_type == 'profile':
-        destination_dir = ImageManager.PROFILE_DIR
-        url_prefix = '/static/upload/profileImage/'
-    elif image_type == 'cover':
-        destination_dir = ImageManager.COVER_DIR
-        url_prefix = '/static/upload/coverImage/'
-    else:
+def _check_image_type(image_type: str) -> None:
+    if image_type not in ('profile', 'cover'):
         raise ValueError("Type d'image invalide")
-    
-    # Gérer les conflits de noms
-    file_path = os.path.join(destination_dir, filename)
-    counter = 1
-    original_name, extension = os.path.splitext(filename)
-    while os.path.exists(file_path):
-        new_filename = f"{original_name}_{counter}{extension}"
-        file_path = os.path.join(destination_dir, new_filename)
-        filename = new_filename
-        counter += 1
-    
-    # Sauvegarder le fichier
-    with open(file_path, 'wb') as f:
-        f.write(file_content)
-    
-    # Retourner l'URL publique
-    return url_prefix + filename
\ No newline at end of file
+
+
+# Fonction d'aide pour FastAPI
+async def save_uploaded_file(file_content: bytes, filename: str, image_type: str) -> str:
+    """
+    Sauvegarde un fichier uploadé dans le stockage adressé par contenu et
+    retourne son URL publique (un contenu identique n'est stocké qu'une fois).
+    """
+    _check_image_type(image_type)
+    extension = os.path.splitext(filename)[1].lstrip('.') or 'jpg'
+    blob = await blob_store.store_bytes(file_content, extension)
+    return blob.url
+
+
+async def save_uploaded_stream(file: UploadFile, filename: str, image_type: str,
+                               max_size: int = DEFAULT_MAX_UPLOAD_SIZE) -> str:
+    """Variante en flux de save_uploaded_file : lecture par blocs, taille bornée"""
+    _check_image_type(image_type)
+    extension = os.path.splitext(filename)[1].lstrip('.') or 'jpg'
+    blob = await blob_store.store_upload(file, extension, max_size=max_size)
+    return blob.url
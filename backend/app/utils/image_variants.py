@@ -0,0 +1,100 @@
+# app/utils/image_variants.py - Déclinaisons redimensionnées (WebP) des images uploadées
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+from PIL import Image, ImageOps
+
+from app.config import settings
+from app.utils.storage import storage
+
+logger = logging.getLogger(__name__)
+
+# Nom de la déclinaison -> plus grand côté en pixels
+VARIANTS = {
+    "thumb": 128,
+    "list": 480,
+    "full": 1280,
+}
+VARIANT_FORMAT = "WEBP"
+VARIANT_EXTENSION = "webp"
+VARIANT_QUALITY = 80
+
+_executor: Optional[ProcessPoolExecutor] = None
+_slots: Optional[asyncio.Semaphore] = None
+
+
+def variant_path(source: Path, name: str) -> Path:
+    return source.with_name(f"{source.stem}_{name}.{VARIANT_EXTENSION}")
+
+
+def render_variants(source_path: str) -> Dict[str, str]:
+    """
+    Exécuté dans un processus du pool : décode l'image une fois, corrige
+    l'orientation EXIF et écrit chaque déclinaison (jamais agrandie).
+    Retourne nom -> chemin du fichier (format posix).
+    """
+    source = Path(source_path)
+    outputs = {}
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+        # Du plus grand au plus petit : chaque réduction part de la précédente
+        current = image
+        for name, max_edge in sorted(VARIANTS.items(), key=lambda item: -item[1]):
+            resized = current.copy()
+            resized.thumbnail((max_edge, max_edge), Image.LANCZOS)
+            destination = variant_path(source, name)
+            resized.save(destination, VARIANT_FORMAT, quality=VARIANT_QUALITY, method=4)
+            outputs[name] = destination.as_posix()
+            current = resized
+    return outputs
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=settings.IMAGE_WORKERS)
+    return _executor
+
+
+def _get_slots() -> asyncio.Semaphore:
+    # Borne le nombre de travaux en attente pour ne pas accumuler une file illimitée
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(settings.IMAGE_WORKERS * 4)
+    return _slots
+
+
+async def generate_variants(source_path: Union[str, Path]) -> Dict[str, str]:
+    """
+    Produit les déclinaisons hors de la boucle d'événements. En cas d'échec
+    (fichier illisible), retourne {} : l'original reste utilisable.
+    """
+    async with _get_slots():
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(_get_executor(), render_variants, str(source_path))
+        except Exception as e:
+            logger.warning(f"Déclinaisons impossibles pour {source_path}: {e}")
+            return {}
+
+
+async def ensure_variants(source_path: Union[str, Path]) -> Dict[str, str]:
+    """Réutilise les déclinaisons déjà présentes (blob dédupliqué), sinon les génère"""
+    source = Path(source_path)
+    existing = {name: variant_path(source, name) for name in VARIANTS}
+    if await storage.run("variants_exist", lambda: all(path.exists() for path in existing.values())):
+        return {name: path.as_posix() for name, path in existing.items()}
+    return await generate_variants(source)
+
+
+def shutdown_image_workers() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
@@ -0,0 +1,135 @@
+# app/utils/logger.py - Journalisation centralisée, non bloquante et structurée (JSON)
+import atexit
+import json
+import logging
+import queue
+import random
+import re
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+from app.config import settings
+
+# Motifs de secrets masqués dans tous les messages
+_REDACTIONS = [
+    (re.compile(r"(Bearer\s+)[A-Za-z0-9\-_\.=]+", re.IGNORECASE), r"\1[REDACTED]"),
+    (re.compile(r"\beyJ[A-Za-z0-9\-_]+\.[A-Za-z0-9\-_]+\.[A-Za-z0-9\-_]+"), "[REDACTED_JWT]"),
+    # Clés porteuses de secrets uniquement (new_password, access_token, reset_code...) :
+    # status_code=, « error code: » et autres valeurs de diagnostic restent lisibles
+    (re.compile(
+        r"\b((?:(?:\w+_)?(?:password|passwd|secret|token)|verification_code|reset_code)[\"']?\s*[:=]\s*[\"']?)[^\s,\"'}]+",
+        re.IGNORECASE
+    ), r"\1[REDACTED]"),
+]
+
+_listener: Optional[QueueListener] = None
+
+
+def redact(message: str) -> str:
+    for pattern, replacement in _REDACTIONS:
+        message = pattern.sub(replacement, message)
+    return message
+
+
+def _parse_mapping(raw: str) -> Dict[str, str]:
+    """ "app.sql=WARNING,app.auth=DEBUG" -> {"app.sql": "WARNING", "app.auth": "DEBUG"} """
+    mapping = {}
+    for item in filter(None, (part.strip() for part in raw.split(","))):
+        name, _, value = item.partition("=")
+        if name and value:
+            mapping[name.strip()] = value.strip()
+    return mapping
+
+
+class RedactingFilter(logging.Filter):
+    """Masque les secrets avant que le message ne quitte le thread appelant"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        try:
+            message = record.getMessage()
+        except Exception:
+            # Arguments incompatibles avec le format : on garde le gabarit brut
+            # plutôt que de perdre l'enregistrement
+            message = str(record.msg)
+        record.msg = redact(message)
+        record.args = None
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Échantillonne les messages de niveau < WARNING des loggers très bavards
+    (taux par préfixe de logger) ; WARNING et au-delà passent toujours.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        for prefix, rate in self.rates.items():
+            if record.name == prefix or record.name.startswith(prefix + "."):
+                return random.random() < rate
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = redact(self.formatException(record.exc_info))
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setup_logging() -> None:
+    """
+    Installe un QueueHandler sur le logger racine : les appels de log ne font
+    qu'une mise en file, l'écriture (stdout) se fait dans le thread du QueueListener.
+    Idempotent.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    if settings.LOG_FORMAT == "json":
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter({
+        name: float(rate) for name, rate in _parse_mapping(settings.LOG_SAMPLING).items()
+    }))
+    queue_handler.addFilter(RedactingFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(settings.LOG_LEVEL.upper())
+
+    for name, level in _parse_mapping(settings.LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Vide la file et arrête le thread d'écriture"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
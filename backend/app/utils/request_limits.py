@@ -0,0 +1,51 @@
+# app/utils/request_limits.py - Taille maximale des corps de requête, vérifiée avant le parsing
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+REQUEST_TOO_LARGE = "Requête trop volumineuse"
+
+
+class BodySizeLimitMiddleware:
+    """
+    Refuse (413) les corps de requête au-delà de max_body_size, avant que
+    Starlette ne les lise et ne les écrive dans un SpooledTemporaryFile :
+    - Content-Length annoncé trop grand : réponse immédiate, rien n'est lu
+    - corps sans Content-Length (chunked) ou sous-déclaré : la lecture est
+      interrompue dès que le cumul reçu dépasse la limite
+    """
+
+    def __init__(self, app: ASGIApp, max_body_size: int):
+        self.app = app
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    declared = int(value)
+                except ValueError:
+                    declared = 0
+                if declared > self.max_body_size:
+                    response = JSONResponse({"detail": REQUEST_TOO_LARGE}, status_code=413)
+                    await response(scope, receive, send)
+                    return
+                break
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    # Levée pendant la lecture du corps : traitée comme une HTTPException de la route
+                    raise HTTPException(status_code=413, detail=REQUEST_TOO_LARGE)
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -0,0 +1,45 @@
+# app/utils/serialization.py - Sérialisation rapide (orjson) des données lues en base
+from typing import Any, Dict, Iterable, List, Type, TypeVar
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+M = TypeVar("M", bound=BaseModel)
+
+
+def trusted(model: Type[M], doc: Dict[str, Any]) -> M:
+    """
+    Construit un modèle à partir d'un document lu en base sans revalider
+    (model_construct) : réservé aux données dont l'application est la source.
+    """
+    return model.model_construct(**doc)
+
+
+def trusted_list(model: Type[M], docs: Iterable[Dict[str, Any]]) -> List[M]:
+    return [model.model_construct(**doc) for doc in docs]
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(by_alias=True)
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Type non sérialisable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(Response):
+    """
+    Réponse JSON encodée par orjson (datetime, UUID natifs ; modèles Pydantic et
+    ObjectId via _default). Retourner cette réponse depuis un endpoint évite la
+    seconde validation par response_model et le passage par jsonable_encoder.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,179 @@
+# app/utils/static_delivery.py - Service des fichiers statiques : cache long, ETag fort, précompression
+import gzip
+import hashlib
+import logging
+import os
+import re
+from mimetypes import guess_type
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from app.config import settings
+from app.db.migrations import run_once
+from app.utils.storage import storage
+
+try:
+    import brotli
+except ImportError:  # optionnel : seuls les .gz sont alors produits
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Blobs (sha256) et leurs déclinaisons ({sha256}_thumb) : le nom change avec le contenu
+FINGERPRINT = re.compile(r"^[0-9a-f]{64}(?:_[a-z]+)?$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Encodage -> suffixe du fichier précompressé, par ordre de préférence
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+COMPRESSIBLE_EXTENSIONS = {".css", ".js", ".json", ".svg", ".txt", ".html", ".xml", ".map"}
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+
+def _accepted_encodings(headers: Headers) -> set:
+    accepted = set()
+    for part in headers.get("accept-encoding", "").split(","):
+        name, _, params = part.strip().partition(";")
+        if name and params.replace(" ", "") not in ("q=0", "q=0.0"):
+            accepted.add(name.lower())
+    return accepted
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles avec en-têtes de cache adaptés aux uploads :
+    - URL à empreinte (blob) : Cache-Control immutable, ETag fort = empreinte
+    - autres fichiers : max-age court (STATIC_MAX_AGE_SECONDS), ETag de Starlette
+    - sert le fichier .br / .gz voisin si le client l'accepte (Vary: Accept-Encoding)
+    Range et l'envoi du fichier restent ceux de FileResponse (Starlette).
+    """
+
+    def _negotiate(
+        self, full_path: PathLike, stat_result: os.stat_result, headers: Headers
+    ) -> Tuple[Optional[str], PathLike, os.stat_result, bool]:
+        """Retourne (encodage, chemin, stat, variantes présentes)"""
+        if Path(full_path).suffix.lower() not in COMPRESSIBLE_EXTENSIONS:
+            return None, full_path, stat_result, False
+
+        accepted = _accepted_encodings(headers)
+        has_variants = False
+        for encoding, suffix in PRECOMPRESSED:
+            candidate = f"{full_path}{suffix}"
+            try:
+                candidate_stat = os.stat(candidate)
+            except OSError:
+                continue
+            has_variants = True
+            # Une variante plus ancienne que l'original n'est pas servie
+            if encoding in accepted and candidate_stat.st_mtime >= stat_result.st_mtime:
+                return encoding, candidate, candidate_stat, True
+        return None, full_path, stat_result, has_variants
+
+    def file_response(
+        self,
+        full_path: PathLike,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        media_type = guess_type(str(full_path))[0] or "text/plain"
+
+        # Les requêtes Range portent sur la représentation non compressée
+        encoding, served_path, served_stat, has_variants = None, full_path, stat_result, False
+        if "range" not in request_headers:
+            encoding, served_path, served_stat, has_variants = self._negotiate(full_path, stat_result, request_headers)
+
+        response = FileResponse(served_path, status_code=status_code, stat_result=served_stat, media_type=media_type)
+
+        stem = Path(full_path).name.split(".", 1)[0]
+        if FINGERPRINT.match(stem):
+            response.headers["etag"] = f'"{stem}-{encoding}"' if encoding else f'"{stem}"'
+            response.headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+        else:
+            if encoding:
+                response.headers["etag"] = response.headers["etag"][:-1] + f'-{encoding}"'
+            response.headers["cache-control"] = f"public, max-age={settings.STATIC_MAX_AGE_SECONDS}"
+
+        if encoding:
+            response.headers["content-encoding"] = encoding
+        if has_variants:
+            response.headers["vary"] = "Accept-Encoding"
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+def precompress_file(path: Path) -> int:
+    """Écrit les variantes .gz (et .br si brotli est installé) d'un fichier. Retourne le nombre écrit"""
+    content = path.read_bytes()
+    written = 0
+    outputs = [(".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        outputs.append((".br", lambda data: brotli.compress(data, quality=11)))
+
+    for suffix, compress in outputs:
+        target = path.with_name(path.name + suffix)
+        if target.exists() and target.stat().st_mtime >= path.stat().st_mtime:
+            continue
+        compressed = compress(content)
+        # Inutile de servir une variante qui ne gagne presque rien
+        if len(compressed) >= len(content) * 0.9:
+            continue
+        temp = target.with_name(f".{target.name}.part")
+        temp.write_bytes(compressed)
+        os.replace(temp, target)
+        written += 1
+    return written
+
+
+def _compressible_files(root: Union[str, Path]):
+    for path in Path(root).rglob("*"):
+        if path.is_file() and path.suffix.lower() in COMPRESSIBLE_EXTENSIONS:
+            yield path
+
+
+def tree_signature(root: Union[str, Path]) -> str:
+    """Empreinte (chemin, taille, mtime) des fichiers compressibles : change à chaque déploiement qui les modifie"""
+    digest = hashlib.sha256()
+    for path in sorted(_compressible_files(root)):
+        stat = path.stat()
+        digest.update(f"{path.relative_to(root)}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+def precompress_directory(root: Union[str, Path]) -> int:
+    """Précompresse les fichiers compressibles de l'arborescence (les images sont ignorées)"""
+    written = 0
+    for path in _compressible_files(root):
+        try:
+            written += precompress_file(path)
+        except OSError as e:
+            logger.warning(f"Précompression impossible pour {path}: {e}")
+    if written:
+        logger.info(f"{written} variante(s) précompressée(s) sous {root}")
+    return written
+
+
+async def precompress_static(root: Union[str, Path]) -> None:
+    """
+    Tâche de démarrage : précompresse l'arborescence une seule fois par version
+    des fichiers, quel que soit le nombre de workers. Le verrou run_once est
+    nommé d'après l'empreinte de l'arborescence : un redémarrage sans
+    changement ne parcourt que les stat(), un déploiement qui modifie les
+    fichiers relance la précompression (incrémentale) sur un seul worker.
+    """
+    try:
+        signature = await storage.run("static_signature", tree_signature, root)
+        await run_once(
+            f"precompress_static:{signature}",
+            lambda: storage.run("precompress_static", precompress_directory, root),
+        )
+    except Exception as e:
+        logger.error(f"Erreur précompression des fichiers statiques: {e}")
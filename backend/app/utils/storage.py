@@ -0,0 +1,199 @@
+# app/utils/storage.py - Opérations fichiers hors de la boucle d'événements (pool de threads borné)
+import asyncio
+import hashlib
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+from app.config import settings
+from app.db.instrumentation import LATENCY_BUCKETS_MS
+
+PathLike = Union[str, Path]
+
+
+class UploadTooLargeError(Exception):
+    pass
+
+
+class StorageMetrics:
+    """Latence par opération (attente d'un créneau incluse) et occupation du pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, dict] = {}
+        self.in_flight = 0
+        self.waiting = 0
+
+    def record(self, operation: str, wait_ms: float, duration_ms: float, failed: bool) -> None:
+        with self._lock:
+            entry = self._stats.get(operation)
+            if entry is None:
+                entry = {
+                    "count": 0,
+                    "failures": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "wait_ms": 0.0,
+                    "histogram": [0] * len(LATENCY_BUCKETS_MS),
+                }
+                self._stats[operation] = entry
+            entry["count"] += 1
+            entry["failures"] += int(failed)
+            entry["total_ms"] += duration_ms
+            entry["max_ms"] = max(entry["max_ms"], duration_ms)
+            entry["wait_ms"] += wait_ms
+            for i, bound in enumerate(LATENCY_BUCKETS_MS):
+                if duration_ms <= bound:
+                    entry["histogram"][i] += 1
+                    break
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            operations = [
+                {
+                    "operation": operation,
+                    "count": entry["count"],
+                    "failures": entry["failures"],
+                    "avg_ms": round(entry["total_ms"] / entry["count"], 3),
+                    "max_ms": round(entry["max_ms"], 3),
+                    "avg_wait_ms": round(entry["wait_ms"] / entry["count"], 3),
+                    "histogram": dict(zip(
+                        [str(b) for b in LATENCY_BUCKETS_MS], entry["histogram"]
+                    )),
+                }
+                for operation, entry in self._stats.items()
+            ]
+        operations.sort(key=lambda item: item["count"], reverse=True)
+        return {"in_flight": self.in_flight, "waiting": self.waiting, "operations": operations}
+
+
+def _temp_path(destination: Path) -> Path:
+    # Même dossier que la destination : le rename final reste atomique
+    return destination.with_name(f".{destination.name}.{uuid.uuid4().hex}.part")
+
+
+def _copy_stream(source, destination: Path, max_size: int, chunk_size: int):
+    """Copie bloc par bloc (mémoire bornée), hash SHA-256 et rename atomique"""
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = _temp_path(destination)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(temp_path, "wb") as out:
+            while True:
+                chunk = source.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLargeError(f"Fichier trop volumineux (> {max_size} octets)")
+                digest.update(chunk)
+                out.write(chunk)
+        os.replace(temp_path, destination)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+    return size, digest.hexdigest()
+
+
+def _write_atomic(destination: Path, content: bytes) -> None:
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = _temp_path(destination)
+    try:
+        with open(temp_path, "wb") as out:
+            out.write(content)
+        os.replace(temp_path, destination)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+
+class StorageService:
+    """
+    Point de passage unique des accès disque depuis les handlers async.
+    Chaque opération s'exécute sur un pool de threads dédié (STORAGE_WORKERS),
+    le nombre d'opérations admises simultanément est borné par
+    STORAGE_MAX_CONCURRENCY : au-delà, les appelants attendent un créneau
+    au lieu d'empiler des travaux dans l'executor.
+    """
+
+    def __init__(self, max_workers: int, max_concurrency: int):
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency
+        self.metrics = StorageMetrics()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="storage")
+        return self._executor
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        return self._slots
+
+    async def run(self, operation: str, fn: Callable, *args):
+        """Exécute fn(*args) sur le pool et enregistre sa latence sous `operation`"""
+        queued_at = time.perf_counter()
+        self.metrics.waiting += 1
+        async with self._get_slots():
+            self.metrics.waiting -= 1
+            self.metrics.in_flight += 1
+            started_at = time.perf_counter()
+            failed = True
+            try:
+                result = await asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+                failed = False
+                return result
+            finally:
+                self.metrics.in_flight -= 1
+                finished_at = time.perf_counter()
+                self.metrics.record(
+                    operation,
+                    (started_at - queued_at) * 1000,
+                    (finished_at - started_at) * 1000,
+                    failed,
+                )
+
+    async def save_stream(self, source, destination: PathLike, max_size: int, chunk_size: int):
+        """
+        Copie un fichier ouvert (ex. UploadFile.file) vers destination en un
+        seul passage sur le pool. Retourne (taille, sha256).
+        """
+        return await self.run("save_stream", _copy_stream, source, Path(destination), max_size, chunk_size)
+
+    async def write_atomic(self, destination: PathLike, content: bytes) -> None:
+        await self.run("write_atomic", _write_atomic, Path(destination), content)
+
+    async def exists(self, path: PathLike) -> bool:
+        return await self.run("exists", os.path.exists, path)
+
+    async def makedirs(self, path: PathLike) -> None:
+        await self.run("makedirs", lambda: os.makedirs(path, exist_ok=True))
+
+    async def replace(self, source: PathLike, destination: PathLike) -> None:
+        await self.run("replace", os.replace, source, destination)
+
+    async def move(self, source: PathLike, destination: PathLike) -> str:
+        return await self.run("move", shutil.move, str(source), str(destination))
+
+    async def unlink(self, path: PathLike) -> None:
+        await self.run("unlink", lambda: Path(path).unlink(missing_ok=True))
+
+    async def glob(self, directory: PathLike, pattern: str) -> List[Path]:
+        return await self.run("glob", lambda: list(Path(directory).glob(pattern)))
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+storage = StorageService(settings.STORAGE_WORKERS, settings.STORAGE_MAX_CONCURRENCY)
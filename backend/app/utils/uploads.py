@@ -0,0 +1,54 @@
+# app/utils/uploads.py - Réception des fichiers uploadés en flux (taille bornée, hash, écriture atomique)
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Union
+
+from fastapi import UploadFile
+
+from app.utils.storage import storage, UploadTooLargeError
+
+CHUNK_SIZE = 64 * 1024  # 64 Ko
+DEFAULT_MAX_UPLOAD_SIZE = 5 * 1024 * 1024  # 5 Mo
+
+__all__ = [
+    "CHUNK_SIZE",
+    "DEFAULT_MAX_UPLOAD_SIZE",
+    "StoredUpload",
+    "UploadTooLargeError",
+    "save_upload_stream",
+    "write_atomic",
+]
+
+
+@dataclass
+class StoredUpload:
+    path: Path
+    size: int
+    sha256: str
+
+
+async def save_upload_stream(
+    file: UploadFile,
+    destination: Union[str, Path],
+    max_size: int = DEFAULT_MAX_UPLOAD_SIZE,
+    chunk_size: int = CHUNK_SIZE,
+) -> StoredUpload:
+    """
+    Copie un UploadFile par blocs vers `destination` :
+    - lève UploadTooLargeError dès que max_size est dépassé (rien n'est conservé)
+    - calcule le SHA-256 pendant la lecture
+    - écrit dans un fichier temporaire puis le renomme atomiquement
+    La copie complète s'exécute en une fois sur le pool du service de stockage :
+    la boucle d'événements n'est jamais bloquée et la mémoire reste bornée par
+    chunk_size. Le corps a déjà été reçu et mis en tampon par Starlette
+    (SpooledTemporaryFile) avant l'appel : max_size borne le fichier conservé,
+    la taille reçue est bornée en amont par BodySizeLimitMiddleware.
+    """
+    destination = Path(destination)
+    size, sha256 = await storage.save_stream(file.file, destination, max_size, chunk_size)
+    return StoredUpload(path=destination, size=size, sha256=sha256)
+
+
+async def write_atomic(destination: Union[str, Path], content: bytes) -> None:
+    """Écriture via fichier temporaire + rename (jamais de fichier partiel visible)"""
+    await storage.write_atomic(destination, content)
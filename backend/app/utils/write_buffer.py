@@ -0,0 +1,133 @@
+# app/utils/write_buffer.py - Regroupement des écritures MongoDB en bulk_write
+import asyncio
+import logging
+from typing import Any, Dict, Hashable, List
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+
+class CoalescingWriteBuffer:
+    """
+    Absorbe des $set en mémoire, en ne gardant que la dernière valeur de chaque
+    champ par clé, puis les écrit en un seul bulk_write non ordonné :
+    - toutes les `flush_interval` secondes (boucle run())
+    - dès que `max_entries` clés sont en attente
+    - à l'arrêt (close())
+    `max_pending` borne la mémoire : au-delà, l'appelant attend le flush.
+    Un lot dont l'écriture échoue est refusionné dans les écritures en attente
+    (les champs plus récents l'emportent) et retenté au flush suivant ; tant
+    qu'il n'est pas persisté, il reste lisible via get().
+    """
+
+    def __init__(
+        self,
+        collection,
+        key_field: str,
+        flush_interval: float,
+        max_entries: int,
+        max_pending: int,
+        name: str = "write_buffer",
+    ):
+        self.collection = collection
+        self.key_field = key_field
+        self.flush_interval = flush_interval
+        self.max_entries = max_entries
+        self.max_pending = max_pending
+        self.name = name
+        self._pending: Dict[Hashable, Dict[str, Any]] = {}
+        self._in_flight: Dict[Hashable, Dict[str, Any]] = {}
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: "asyncio.Task | None" = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def _merge(self, target: Dict[str, Any], fields: Dict[str, Any]) -> None:
+        target.update(fields)
+
+    def get(self, key: Hashable) -> Dict[str, Any]:
+        """Champs pas encore persistés pour `key` (lot en cours d'écriture compris)"""
+        fields: Dict[str, Any] = {}
+        self._merge(fields, self._in_flight.get(key, {}))
+        self._merge(fields, self._pending.get(key, {}))
+        return fields
+
+    async def add(self, key: Hashable, fields: Dict[str, Any]) -> None:
+        self._merge(self._pending.setdefault(key, {}), fields)
+
+        if len(self._pending) >= self.max_pending:
+            await self.flush()
+        elif len(self._pending) >= self.max_entries and not self._flush_in_progress():
+            self._flush_task = asyncio.create_task(self.flush())
+
+    def _flush_in_progress(self) -> bool:
+        return self._flush_task is not None and not self._flush_task.done()
+
+    def _operation(self, key: Hashable, fields: Dict[str, Any]) -> UpdateOne:
+        return UpdateOne({self.key_field: key}, {"$set": fields})
+
+    def _requeue(self, batch: Dict[Hashable, Dict[str, Any]]) -> None:
+        """Remet un lot non persisté en attente, sous les écritures arrivées depuis"""
+        for key, fields in batch.items():
+            merged: Dict[str, Any] = {}
+            self._merge(merged, fields)
+            self._merge(merged, self._pending.get(key, {}))
+            self._pending[key] = merged
+
+    async def flush(self) -> int:
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+            self._in_flight = batch
+            keys = list(batch)
+            operations: List[UpdateOne] = [self._operation(key, batch[key]) for key in keys]
+            try:
+                await self.collection.bulk_write(operations, ordered=False)
+            except BulkWriteError as e:
+                # Écriture non ordonnée : seules les opérations en erreur sont à rejouer
+                failed = {keys[err["index"]] for err in e.details.get("writeErrors", [])}
+                self._requeue({key: batch[key] for key in keys if key in failed})
+                logger.error(f"[{self.name}] {len(failed)}/{len(operations)} écritures en échec, remises en attente: {e}")
+            except Exception as e:
+                self._requeue(batch)
+                logger.error(f"[{self.name}] Échec du flush de {len(operations)} écritures, remises en attente: {e}")
+            finally:
+                self._in_flight = {}
+            return len(operations)
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def close(self) -> None:
+        if self._flush_in_progress():
+            await self._flush_task
+        await self.flush()
+
+
+class CoalescingCounterBuffer(CoalescingWriteBuffer):
+    """
+    Variante pour les compteurs : les deltas d'une même clé sont additionnés
+    en mémoire et écrits en $inc. Un lot en échec est réadditionné aux deltas
+    arrivés depuis. La perte en cas de crash est bornée par l'intervalle de
+    flush.
+    """
+
+    def _merge(self, target: Dict[str, Any], fields: Dict[str, Any]) -> None:
+        for field, delta in fields.items():
+            target[field] = target.get(field, 0) + delta
+
+    async def increment(self, key: Hashable, field: str, delta: int = 1) -> None:
+        await self.add(key, {field: delta})
+
+    def pending(self, key: Hashable, field: str) -> int:
+        """Delta pas encore persisté (lot en cours d'écriture compris), à ajouter à la valeur lue en base"""
+        return self.get(key).get(field, 0)
+
+    def _operation(self, key: Hashable, fields: Dict[str, Any]) -> UpdateOne:
+        return UpdateOne({self.key_field: key}, {"$inc": fields})
@@ -0,0 +1,67 @@
+"""
+Débit de génération des déclinaisons (thumb / list / full en WebP).
+
+Compare le rendu séquentiel dans le processus courant (ce que ferait un
+handler qui redimensionne inline) au pool de processus utilisé par
+generate_variants, sur des JPEG synthétiques de la taille d'une photo mobile.
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_image_variants --images 24 --size 3000
+"""
+import argparse
+import asyncio
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image
+
+from app.utils.image_variants import VARIANTS, generate_variants, render_variants, shutdown_image_workers
+
+
+def synthetic_images(directory: Path, count: int, size: int) -> list:
+    paths = []
+    for i in range(count):
+        path = directory / f"photo_{i}.jpg"
+        Image.effect_noise((size, size * 3 // 4), 64 + i).convert("RGB").save(path, "JPEG", quality=90)
+        paths.append(path)
+    return paths
+
+
+def sequential(paths: list) -> float:
+    start = time.perf_counter()
+    for path in paths:
+        render_variants(str(path))
+    return time.perf_counter() - start
+
+
+async def pooled(paths: list) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(generate_variants(path) for path in paths))
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=int, default=24)
+    parser.add_argument("--size", type=int, default=3000)
+    args = parser.parse_args()
+
+    directory = Path(tempfile.mkdtemp(prefix="bench_variants_"))
+    try:
+        paths = synthetic_images(directory, args.images, args.size)
+        print(f"{args.images} images {args.size}px -> {', '.join(VARIANTS)}")
+
+        slow = sequential(paths)
+        print(f"{'séquentiel (inline)':<24} {args.images / slow:8.2f} images / s")
+        fast = asyncio.run(pooled(paths))
+        print(f"{'pool de processus':<24} {args.images / fast:8.2f} images / s")
+        print(f"Gain : x{slow / fast:.1f}")
+    finally:
+        shutdown_image_workers()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
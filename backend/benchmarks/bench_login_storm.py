@@ -0,0 +1,74 @@
+"""
+Tempête de connexions : N vérifications bcrypt simultanées.
+
+Avant : pwd_context.verify appelé directement dans le handler async, chaque
+vérification bloque la boucle d'événements (~100-300 ms selon le coût).
+Après : password_hasher (pool de threads borné, bcrypt libère le GIL).
+
+Pour chaque variante : débit de connexions et retard maximal d'un « tick »
+de 10 ms exécuté en parallèle, qui représente les autres requêtes servies
+par le même worker.
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_login_storm --logins 64 --rounds 12
+"""
+import argparse
+import asyncio
+import time
+
+from passlib.context import CryptContext
+
+from app.auth.password import PasswordHasher, pwd_context
+
+TICK_SECONDS = 0.01
+
+
+async def ticker(stop: asyncio.Event) -> float:
+    """Retard maximal observé entre deux ticks (ms)"""
+    worst = 0.0
+    while not stop.is_set():
+        expected = time.perf_counter() + TICK_SECONDS
+        await asyncio.sleep(TICK_SECONDS)
+        worst = max(worst, time.perf_counter() - expected)
+    return worst * 1000
+
+
+async def storm(label: str, verify, logins: int, hashed: str) -> None:
+    stop = asyncio.Event()
+    tick = asyncio.create_task(ticker(stop))
+    await asyncio.sleep(TICK_SECONDS)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(verify("motdepasse", hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    worst_lag_ms = await tick
+    assert all(results)
+    print(f"{label:<28} {logins / elapsed:8.1f} connexions / s   retard boucle max {worst_lag_ms:8.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=args.rounds)
+    hashed = context.hash("motdepasse")
+    print(f"{args.logins} connexions, bcrypt {args.rounds} rounds, {args.workers} threads")
+
+    async def inline(plain: str, stored: str) -> bool:
+        return pwd_context.verify(plain, stored)
+
+    hasher = PasswordHasher(workers=args.workers, max_queue=args.logins)
+
+    asyncio.run(storm("inline (avant)", inline, args.logins, hashed))
+    asyncio.run(storm("pool borné (après)", hasher.verify, args.logins, hashed))
+    hasher.shutdown()
+    print(hasher.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Coût par élément de la sérialisation d'une réponse de 1 000 profils.
+
+Avant : UserProfile(**doc) (validation EmailStr), puis revalidation par
+response_model et jsonable_encoder + json.dumps (chemin FastAPI par défaut).
+Après : model_construct (données de confiance) + orjson (FastJSONResponse).
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_serialization --rows 1000 --rounds 20
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.users.models import UserProfile
+from app.utils.serialization import dumps, trusted_list
+
+
+def synthetic_docs(rows: int) -> list:
+    now = datetime.utcnow()
+    return [
+        {
+            "_id": str(ObjectId()),
+            "user_id": i,
+            "email": f"user{i}@example.com",
+            "first_name": "Awa",
+            "last_name": f"Traoré {i}",
+            "username": f"awa{i}",
+            "phone": f"+226 70 {i:08d}",
+            "bio": "Anniversaires et événements",
+            "avatar_url": f"/static/upload/profileImage/avatar_{i}.webp",
+            "online_status": i % 3 == 0,
+            "last_seen": now - timedelta(minutes=i),
+            "registered_at": now - timedelta(days=i),
+            "interests": ["musique", "sport"],
+            "followers": i * 3,
+        }
+        for i in range(rows)
+    ]
+
+
+def before(docs: list) -> bytes:
+    profiles = [UserProfile(**doc) for doc in docs]
+    validated = TypeAdapter(list[UserProfile]).validate_python(
+        [p.model_dump(by_alias=True) for p in profiles]
+    )
+    return json.dumps(jsonable_encoder(validated)).encode()
+
+
+def after(docs: list) -> bytes:
+    return dumps(trusted_list(UserProfile, docs))
+
+
+def measure(label: str, fn, docs: list, rounds: int) -> float:
+    fn(docs)  # échauffement
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn(docs)
+    per_item_us = (time.perf_counter() - start) / (rounds * len(docs)) * 1e6
+    print(f"{label:<36} {per_item_us:8.2f} µs / élément")
+    return per_item_us
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    docs = synthetic_docs(args.rows)
+    slow = measure("validation + jsonable_encoder (avant)", before, docs, args.rounds)
+    fast = measure("model_construct + orjson (après)", after, docs, args.rounds)
+    print(f"Gain : x{slow / fast:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark de la recherche utilisateurs sur 1M de profils synthétiques.
+
+Compare l'ancienne requête ($or de regex insensibles à la casse) avec la
+recherche par préfixe sur search_keys.* et la recherche texte.
+
+Usage (depuis backend/) :
+    MONGO_URL=mongodb://localhost:27017 python -m benchmarks.bench_user_search --profiles 1000000
+"""
+import argparse
+import asyncio
+import os
+import random
+import re
+import string
+import time
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.users.search import SEARCH_INDEXES, build_search_keys, normalize_search_key
+
+FIRST_NAMES = ["Émilie", "Jean", "Aïcha", "Moussa", "Zoé", "François", "Fatou", "Hélène", "Ousmane", "Léa"]
+LAST_NAMES = ["Ouédraogo", "Dupont", "Traoré", "Bako", "Kaboré", "Martin", "Sawadogo", "Lefèvre", "Diallo"]
+QUERIES = ["emi", "Jean", "oued", "bak", "zo", "fatou dia", "lef", "+226 70", "xyz"]
+
+
+def synthetic_profile(i: int) -> dict:
+    first = random.choice(FIRST_NAMES)
+    last = random.choice(LAST_NAMES)
+    suffix = "".join(random.choices(string.ascii_lowercase, k=4))
+    profile = {
+        "user_id": i,
+        "first_name": first,
+        "last_name": last,
+        "username": f"{normalize_search_key(first)}{suffix}{i}",
+        "email": f"{normalize_search_key(first)}.{i}@example.com",
+        "phone": f"+226 70 {i:08d}",
+    }
+    profile["search_keys"] = build_search_keys(profile)
+    return profile
+
+
+async def seed(collection, total: int, batch: int = 10_000) -> None:
+    await collection.drop()
+    for start in range(0, total, batch):
+        await collection.insert_many(
+            [synthetic_profile(i) for i in range(start, min(start + batch, total))],
+            ordered=False
+        )
+    for spec in SEARCH_INDEXES:
+        options = {k: v for k, v in spec.items() if k != "keys"}
+        await collection.create_index(spec["keys"], **options)
+
+
+async def timed(label: str, make_cursor, rounds: int) -> None:
+    durations = []
+    for _ in range(rounds):
+        for q in QUERIES:
+            start = time.perf_counter()
+            await make_cursor(q).to_list(length=50)
+            durations.append(time.perf_counter() - start)
+    durations.sort()
+    p50 = durations[len(durations) // 2] * 1000
+    p95 = durations[int(len(durations) * 0.95)] * 1000
+    print(f"{label:<28} p50={p50:8.2f} ms  p95={p95:8.2f} ms")
+
+
+def legacy_query(collection):
+    def make(q):
+        pattern = {"$regex": f"^{re.escape(q)}", "$options": "i"}
+        return collection.find({"$or": [{f: pattern} for f in ("first_name", "last_name", "email", "username", "phone")]}).limit(50)
+    return make
+
+
+def prefix_query(collection):
+    def make(q):
+        prefix = {"$regex": f"^{re.escape(normalize_search_key(q))}"}
+        return collection.find({"$or": [{f"search_keys.{f}": prefix} for f in ("first_name", "last_name", "username", "email")]}).limit(50)
+    return make
+
+
+def text_query(collection):
+    def make(q):
+        return collection.find({"$text": {"$search": normalize_search_key(q)}}).limit(50)
+    return make
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profiles", type=int, default=1_000_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--skip-seed", action="store_true")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    collection = client["anniv_bench"]["profiles"]
+
+    if not args.skip_seed:
+        start = time.perf_counter()
+        await seed(collection, args.profiles)
+        print(f"Seed de {args.profiles} profils : {time.perf_counter() - start:.1f} s")
+
+    await timed("regex $or (ancien)", legacy_query(collection), args.rounds)
+    await timed("préfixe search_keys", prefix_query(collection), args.rounds)
+    await timed("index texte", text_query(collection), args.rounds)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())